@@ -1,6 +1,8 @@
 from importlib import import_module
 
 from django import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.module_loading import module_has_submodule
 
 from pulpcore.exceptions.plugin import MissingPlugin
@@ -138,3 +140,14 @@ class PulpAppConfig(PulpPluginAppConfig):
     # with manage.py, etc. This cannot contain a dot and must not conflict with the name of a
     # package containing a Django app.
     label = 'pulp_app'
+
+    def ready(self):
+        super().ready()
+        # circular import avoidance
+        from pulpcore.app.models import Artifact
+
+        checksums = set(settings.ALLOWED_CONTENT_CHECKSUMS)
+        if 'sha256' not in checksums or not checksums <= set(Artifact.DIGEST_FIELDS):
+            raise ImproperlyConfigured(
+                'ALLOWED_CONTENT_CHECKSUMS must contain sha256 and only checksums out of: '
+                '{checksums}'.format(checksums=', '.join(Artifact.DIGEST_FIELDS)))
@@ -0,0 +1,133 @@
+"""
+A compressed bitmap of content primary keys.
+"""
+import zlib
+
+
+class ContentBitmap:
+    """
+    An immutable set of integer primary keys stored as a bitmap.
+
+    Bit N is set when the primary key N is a member of the set. The bits are kept in a single
+    Python int so set algebra between two bitmaps (union, intersection, difference) runs as one
+    C-level operation instead of a query. Bitmaps are zlib compressed for storage.
+
+    Examples:
+        >>> added = ContentBitmap.from_pks([1, 5, 9])
+        >>> removed = ContentBitmap.from_pks([5])
+        >>> list(added - removed)
+        [1, 9]
+        >>> 9 in added
+        True
+
+    Attributes:
+        bits (int): The bitmap.
+    """
+
+    def __init__(self, bits=0):
+        """
+        Args:
+            bits (int): The bitmap.
+        """
+        self.bits = bits
+
+    @classmethod
+    def from_pks(cls, pks):
+        """
+        Create a bitmap from primary keys.
+
+        Args:
+            pks (iterable): Of integer primary keys.
+
+        Returns:
+            ContentBitmap: The bitmap of ``pks``.
+        """
+        buffer = bytearray()
+        for pk in pks:
+            index = pk >> 3
+            if index >= len(buffer):
+                buffer.extend(bytes(max(index + 1 - len(buffer), len(buffer))))
+            buffer[index] |= 1 << (pk & 7)
+        return cls(int.from_bytes(buffer, 'little'))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Create a bitmap from its compressed representation.
+
+        Args:
+            data (bytes): The bitmap as returned by :meth:`to_bytes`.
+
+        Returns:
+            ContentBitmap: The bitmap.
+        """
+        return cls(int.from_bytes(zlib.decompress(bytes(data)), 'little'))
+
+    def to_bytes(self):
+        """
+        Returns:
+            bytes: The compressed representation of the bitmap.
+        """
+        length = (self.bits.bit_length() + 7) // 8
+        return zlib.compress(self.bits.to_bytes(length, 'little'))
+
+    def union(self, other):
+        """
+        Returns:
+            ContentBitmap: The primary keys in either bitmap.
+        """
+        return ContentBitmap(self.bits | other.bits)
+
+    def intersection(self, other):
+        """
+        Returns:
+            ContentBitmap: The primary keys in both bitmaps.
+        """
+        return ContentBitmap(self.bits & other.bits)
+
+    def difference(self, other):
+        """
+        Returns:
+            ContentBitmap: The primary keys in this bitmap but not in ``other``.
+        """
+        return ContentBitmap(self.bits & ~other.bits)
+
+    def issubset(self, other):
+        """
+        Returns:
+            bool: True when every primary key in this bitmap is also in ``other``.
+        """
+        return self.bits & ~other.bits == 0
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __le__ = issubset
+
+    def __eq__(self, other):
+        return isinstance(other, ContentBitmap) and self.bits == other.bits
+
+    def __contains__(self, pk):
+        return bool((self.bits >> pk) & 1)
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __iter__(self):
+        """
+        Iterate the primary keys in ascending order.
+        """
+        data = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+        for index, byte in enumerate(data):
+            if not byte:
+                continue
+            base = index << 3
+            for offset in range(8):
+                if byte & (1 << offset):
+                    yield base + offset
+
+    def __repr__(self):
+        return '<ContentBitmap: {n} members>'.format(n=len(self))
@@ -1,7 +1,9 @@
-import hashlib
+from django.conf import settings
 from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from django.core.files.uploadedfile import TemporaryUploadedFile
 
+from pulpcore.app.hashing import ParallelHasher
+
 
 class PulpTemporaryUploadedFile(TemporaryUploadedFile):
     """
@@ -9,9 +11,8 @@ class PulpTemporaryUploadedFile(TemporaryUploadedFile):
     """
 
     def __init__(self, name, content_type, size, charset, content_type_extra=None):
-        self.hashers = {}
-        for hasher in hashlib.algorithms_guaranteed:
-            self.hashers[hasher] = getattr(hashlib, hasher)()
+        self.hasher = ParallelHasher(settings.ALLOWED_CONTENT_CHECKSUMS)
+        self.hashers = self.hasher.hashers
         super().__init__(name, content_type, size, charset, content_type_extra)
 
 
@@ -40,9 +41,12 @@ class HashingFileUploadHandler(TemporaryFileUploadHandler):
                                               content_type_extra)
 
     def receive_data_chunk(self, raw_data, start):
+        self.file.hasher.update(raw_data)
         self.file.write(raw_data)
-        for hasher in hashlib.algorithms_guaranteed:
-            self.file.hashers[hasher].update(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.hasher.flush()
+        return super().file_complete(file_size)
 
 
 class TemporaryDownloadedFile(TemporaryUploadedFile):
@@ -50,8 +54,9 @@ class TemporaryDownloadedFile(TemporaryUploadedFile):
     A temporary downloaded file.
 
     The FileSystemStorage backend treats this object the same as a TemporaryUploadedFile. The
-    storage backend attempts to link the file to its final location. If the final location is on a
-    different physical drive, the file is copied to its final destination.
+    storage backend renames the file to its final location. If the final location is on a
+    different physical drive, the file is linked, cloned or copied by the kernel to its final
+    destination, see :func:`~pulpcore.app.models.storage.move_file`.
     """
 
     def __init__(self, file, name=None):
@@ -0,0 +1,119 @@
+"""
+Concurrent computation of several digests of the same data.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+
+# The size of the chunks read by ParallelHasher.update_from_file()
+CHUNK_SIZE = 1048576  # 1 megabyte
+
+# Chunks smaller than this are hashed serially, a thread handoff costs more than it saves
+PARALLEL_THRESHOLD = 16384
+
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    """
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The hashing threads of the current process. The
+            threads don't survive a fork, so a forked process creates its own.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ThreadPoolExecutor(max_workers=len(hashlib.algorithms_guaranteed),
+                                       thread_name_prefix='hashing')
+        _executor_pid = os.getpid()
+    return _executor
+
+
+class ParallelHasher:
+    """
+    Computes the digests of several algorithms over the same data concurrently.
+
+    hashlib releases the GIL while hashing large buffers, so each chunk is hashed by every
+    algorithm in its own thread, on the same buffer. The next chunk is read while the previous
+    one is hashed, and each algorithm still sees the chunks in order.
+
+    Examples:
+        >>> hasher = ParallelHasher(('sha256', 'md5'))
+        >>> with open(path, 'rb') as f:
+        >>>     size = hasher.update_from_file(f)
+        >>> hasher.hexdigests()
+        {'sha256': '...', 'md5': '...'}
+
+    Attributes:
+        hashers (dict): The hashlib hash objects keyed on the algorithm name. They are up to date
+            once :meth:`flush` is called.
+    """
+
+    def __init__(self, algorithms):
+        """
+        Args:
+            algorithms (iterable): Of algorithm names provided by hashlib.
+        """
+        self.hashers = {name: hashlib.new(name) for name in algorithms}
+        self._pending = []
+
+    def update(self, data):
+        """
+        Hash a chunk of data with every algorithm.
+
+        The chunk is hashed in the background. It must not be modified until the next call to
+        :meth:`update` or :meth:`flush`.
+
+        Args:
+            data (bytes-like): The chunk of data.
+        """
+        self.flush()
+        if len(self.hashers) < 2 or len(data) < PARALLEL_THRESHOLD:
+            for hasher in self.hashers.values():
+                hasher.update(data)
+            return
+        executor = _get_executor()
+        self._pending = [executor.submit(hasher.update, data) for hasher in self.hashers.values()]
+
+    def update_from_file(self, file, chunk_size=CHUNK_SIZE):
+        """
+        Hash the data read from a file with every algorithm.
+
+        The file is read into two alternating buffers, one being hashed while the other is read.
+
+        Args:
+            file (file): A file opened in binary mode.
+            chunk_size (int): The size of the chunks read.
+
+        Returns:
+            int: The number of bytes read.
+        """
+        buffers = (bytearray(chunk_size), bytearray(chunk_size))
+        size = 0
+        index = 0
+        while True:
+            buffer = buffers[index % 2]
+            read = file.readinto(buffer)
+            if not read:
+                break
+            self.update(memoryview(buffer)[:read])
+            size += read
+            index += 1
+        self.flush()
+        return size
+
+    def flush(self):
+        """
+        Wait until every algorithm has hashed the data passed so far.
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def hexdigests(self):
+        """
+        Returns:
+            dict: The hex digests keyed on the algorithm name.
+        """
+        self.flush()
+        return {name: hasher.hexdigest() for name, hasher in self.hashers.items()}
@@ -0,0 +1,33 @@
+from gettext import gettext as _
+
+from django.core.management import BaseCommand
+
+from pulpcore.app.models import RepositoryVersion
+
+
+class Command(BaseCommand):
+    """
+    Django management command for storing the content summaries of existing repository versions.
+    """
+    help = _('Computes and stores the content summaries of repository versions which have none.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repository',
+                            dest='repository',
+                            default=None,
+                            help=_('Only backfill the versions of the repository with this name.'))
+
+    def handle(self, *args, **options):
+        versions = RepositoryVersion.objects.filter(complete=True, content_summary__isnull=True)
+        if options['repository']:
+            versions = versions.filter(repository__name=options['repository'])
+
+        # Oldest first, so each summary is derived from the one stored just before it.
+        count = 0
+        for version in versions.select_related('repository').order_by('repository', 'number'):
+            version.summarize_content()
+            version.save(update_fields=['content_summary', 'content_added_summary',
+                                        'content_removed_summary'])
+            count += 1
+
+        self.stdout.write(_('Stored the content summaries of %d repository versions.') % count)
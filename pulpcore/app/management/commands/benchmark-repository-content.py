@@ -0,0 +1,87 @@
+from gettext import gettext as _
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from pulpcore.app.models import Repository, RepositoryContent
+
+
+class Command(BaseCommand):
+    """
+    Django management command for timing the repository content queries of a repository.
+
+    Run it before and after partitioning the repository content table to compare both layouts.
+    """
+    help = _('Times the membership, diff and version change queries of a repository, and reports '
+             'how many tables of the repository content layout each query scans.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('repository',
+                            help=_('The name of the repository to query.'))
+        parser.add_argument('--iterations',
+                            type=int,
+                            dest='iterations',
+                            default=5,
+                            help=_('The number of times each query is run.'))
+
+    def handle(self, *args, **options):
+        try:
+            repository = Repository.objects.get(name=options['repository'])
+        except Repository.DoesNotExist:
+            raise CommandError(_('Repository "%s" not found.') % options['repository'])
+        versions = repository.versions.filter(complete=True)
+        if not versions.exists():
+            raise CommandError(_('Repository "%s" has no versions.') % repository.name)
+        first, latest = versions.earliest(), versions.latest()
+
+        table = RepositoryContent._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_inherits WHERE inhparent = %s::regclass',
+                           [table])
+            partitions = cursor.fetchone()[0]
+        if partitions:
+            self.stdout.write(_('Layout: %d hash partitions') % partitions)
+        else:
+            self.stdout.write(_('Layout: single table'))
+
+        queries = (
+            (_('membership'), latest._content_relationships().values('content_id')),
+            (_('diff'), latest.content_diff(first)),
+            (_('added'), latest.added().values('pk')),
+            (_('removed'), latest.removed().values('pk')),
+        )
+        for name, queryset in queries:
+            timings = []
+            for i in range(options['iterations']):
+                start = time.perf_counter()
+                rows = len(list(queryset.all()))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                _('{name}: {rows} rows, {avg:.4f}s average, {best:.4f}s best, '
+                  '{scanned} tables scanned').format(
+                    name=name, rows=rows, avg=sum(timings) / len(timings), best=min(timings),
+                    scanned=self._scanned_tables(queryset, table)))
+
+    @staticmethod
+    def _scanned_tables(queryset, table):
+        """
+        Count the repository content tables, or partitions, in the plan of a query.
+
+        Args:
+            queryset (django.db.models.QuerySet): The query.
+            table (str): The name of the repository content table.
+
+        Returns:
+            int: The number of distinct tables of the layout the query scans.
+        """
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = [row[0] for row in cursor.fetchall()]
+        scanned = set()
+        for line in plan:
+            for word in line.split():
+                if word == table or word.startswith(table + '_p'):
+                    scanned.add(word)
+        return len(scanned)
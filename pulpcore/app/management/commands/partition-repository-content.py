@@ -0,0 +1,128 @@
+from gettext import gettext as _
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from pulpcore.app.models import RepositoryContent
+
+
+class Command(BaseCommand):
+    """
+    Django management command for hash partitioning the RepositoryContent table by repository.
+
+    The table is rebuilt: its rows are copied into a new table with the requested layout, and its
+    indexes and constraints are recreated on the new table. Pulp must not be running meanwhile.
+    """
+    help = _('Hash partitions the repository content table by repository, or merges its '
+             'partitions back into a single table. Stop all Pulp services first.')
+
+    def add_arguments(self, parser):
+        exclusive = parser.add_mutually_exclusive_group(required=True)
+        exclusive.add_argument('--partitions',
+                               type=int,
+                               dest='partitions',
+                               help=_('The number of hash partitions to create.'))
+        exclusive.add_argument('--merge',
+                               action='store_true',
+                               dest='merge',
+                               default=False,
+                               help=_('Merge the partitions back into a single table.'))
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql' or connection.pg_version < 110000:
+            raise CommandError(_('Hash partitioning requires PostgreSQL 11 or later.'))
+
+        table = RepositoryContent._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [table])
+            partitioned = cursor.fetchone()[0] == 'p'
+
+        if options['merge']:
+            if not partitioned:
+                raise CommandError(_('The repository content table is not partitioned.'))
+            partitions = None
+        else:
+            if partitioned:
+                raise CommandError(_('The repository content table is already partitioned. '
+                                     'Merge it before partitioning it again.'))
+            partitions = options['partitions']
+            if partitions < 2:
+                raise CommandError(_('At least 2 partitions are required.'))
+
+        with transaction.atomic():
+            count = self._rebuild(table, partitions)
+
+        if partitions:
+            self.stdout.write(_('Moved %(count)d rows into %(partitions)d partitions.') % {
+                'count': count, 'partitions': partitions})
+        else:
+            self.stdout.write(_('Merged %d rows into a single table.') % count)
+
+    def _rebuild(self, table, partitions):
+        """
+        Copy the table into a new table with the given layout and replace it.
+
+        Args:
+            table (str): The name of the RepositoryContent table.
+            partitions (int): The number of hash partitions, or None for a single table.
+
+        Returns:
+            int: The number of rows copied.
+        """
+        quote_name = connection.ops.quote_name
+        old_table = table + '_old'
+        pk = RepositoryContent._meta.pk.column
+        partition_key = RepositoryContent._meta.get_field('repository').column
+
+        with connection.cursor() as cursor:
+            # Capture the definitions before the indexes and constraints are dropped with the
+            # old table. Primary keys differ between layouts, so they are rebuilt separately.
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = %s::regclass AND contype IN ('u', 'f')", [table])
+            constraints = cursor.fetchall()
+            cursor.execute(
+                "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+                "WHERE i.indrelid = %s::regclass AND NOT EXISTS "
+                "(SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)", [table])
+            indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, pk])
+            sequence = cursor.fetchone()[0]
+
+            cursor.execute('ALTER TABLE {table} RENAME TO {old}'.format(
+                table=quote_name(table), old=quote_name(old_table)))
+            cursor.execute('CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS){layout}'.format(
+                table=quote_name(table), old=quote_name(old_table),
+                layout=' PARTITION BY HASH ({key})'.format(key=quote_name(partition_key))
+                if partitions else ''))
+            for remainder in range(partitions or 0):
+                cursor.execute(
+                    'CREATE TABLE {partition} PARTITION OF {table} '
+                    'FOR VALUES WITH (MODULUS %s, REMAINDER %s)'.format(
+                        partition=quote_name('{table}_p{n}'.format(table=table, n=remainder)),
+                        table=quote_name(table)),
+                    [partitions, remainder])
+
+            cursor.execute('INSERT INTO {table} SELECT * FROM {old}'.format(
+                table=quote_name(table), old=quote_name(old_table)))
+            count = cursor.rowcount
+
+            cursor.execute('ALTER SEQUENCE {sequence} OWNED BY {table}.{pk}'.format(
+                sequence=sequence, table=quote_name(table), pk=quote_name(pk)))
+            cursor.execute('DROP TABLE {old}'.format(old=quote_name(old_table)))
+
+            # The primary key of a partitioned table must contain the partition key. Django
+            # only relies on the uniqueness of the id, which the sequence keeps.
+            pk_columns = [pk, partition_key] if partitions else [pk]
+            cursor.execute('ALTER TABLE {table} ADD CONSTRAINT {name} PRIMARY KEY ({columns})'
+                           .format(table=quote_name(table),
+                                   name=quote_name(table + '_pkey'),
+                                   columns=', '.join(quote_name(c) for c in pk_columns)))
+            for name, definition in constraints:
+                cursor.execute('ALTER TABLE {table} ADD CONSTRAINT {name} {definition}'.format(
+                    table=quote_name(table), name=quote_name(name), definition=definition))
+            for definition in indexes:
+                cursor.execute(definition)
+
+            cursor.execute('ANALYZE {table}'.format(table=quote_name(table)))
+        return count
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_numbers(apps, schema_editor):
+    RepositoryContent = apps.get_model('pulp_app', 'RepositoryContent')
+    RepositoryVersion = apps.get_model('pulp_app', 'RepositoryVersion')
+
+    number_added = RepositoryVersion.objects.filter(
+        pk=OuterRef('version_added_id')).values('number')[:1]
+    RepositoryContent.objects.update(number_added=Subquery(number_added))
+
+    number_removed = RepositoryVersion.objects.filter(
+        pk=OuterRef('version_removed_id')).values('number')[:1]
+    RepositoryContent.objects.filter(version_removed__isnull=False).update(
+        number_removed=Subquery(number_removed))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0002_task_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositorycontent',
+            name='number_added',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='repositorycontent',
+            name='number_removed',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RunPython(populate_numbers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0003_repositorycontent_numbers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='repositorycontent',
+            name='number_added',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='repositorycontent',
+            index=models.Index(fields=['repository', 'number_added', 'number_removed'],
+                               name='pulp_app_rc_number_range_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0004_repositorycontent_number_range_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryVersionContentBitmap',
+            fields=[
+                ('_id', models.AutoField(primary_key=True, serialize=False)),
+                ('_created', models.DateTimeField(auto_now_add=True)),
+                ('_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('bitmap', models.BinaryField()),
+                ('repository_version', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content_bitmap_index', to='pulp_app.RepositoryVersion')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+import pulpcore.app.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0005_repositoryversioncontentbitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositoryversion',
+            name='content_summary',
+            field=pulpcore.app.fields.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='repositoryversion',
+            name='content_added_summary',
+            field=pulpcore.app.fields.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='repositoryversion',
+            name='content_removed_summary',
+            field=pulpcore.app.fields.JSONField(null=True),
+        ),
+    ]
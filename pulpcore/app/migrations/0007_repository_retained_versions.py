@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0006_repositoryversion_content_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='retained_versions',
+            field=models.PositiveIntegerField(null=True),
+        ),
+    ]
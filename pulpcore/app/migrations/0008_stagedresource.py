@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0007_repository_retained_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedResource',
+            fields=[
+                ('_id', models.AutoField(primary_key=True, serialize=False)),
+                ('_created', models.DateTimeField(auto_now_add=True)),
+                ('_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('set_id', models.UUIDField()),
+                ('object_id', models.PositiveIntegerField()),
+            ],
+            options={
+                'unique_together': {('set_id', 'object_id')},
+            },
+        ),
+    ]
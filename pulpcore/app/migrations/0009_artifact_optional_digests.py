@@ -0,0 +1,58 @@
+from django.db import migrations, models
+
+# The digests which may be excluded by the ALLOWED_CONTENT_CHECKSUMS setting
+OPTIONAL_DIGESTS = (
+    ('md5', 32, False),
+    ('sha1', 40, False),
+    ('sha224', 56, False),
+    ('sha384', 96, True),
+    ('sha512', 128, True),
+)
+
+
+def partial_digest_indexes(apps, schema_editor):
+    """
+    Replace the indexes of the optional digests by partial indexes of the non-null digests.
+
+    Inserting an artifact without a digest then doesn't maintain the indexes of the digest.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote_name = connection.ops.quote_name
+    table = apps.get_model('pulp_app', 'Artifact')._meta.db_table
+    with connection.cursor() as cursor:
+        for column, max_length, unique in OPTIONAL_DIGESTS:
+            cursor.execute(
+                "SELECT c.relname, pg_get_indexdef(i.indexrelid), con.conname "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "LEFT JOIN pg_constraint con ON con.conindid = i.indexrelid "
+                "WHERE i.indrelid = %s::regclass AND i.indnatts = 1 AND i.indpred IS NULL "
+                "AND i.indkey[0] = (SELECT attnum FROM pg_attribute "
+                "WHERE attrelid = %s::regclass AND attname = %s)", [table, table, column])
+            for name, definition, constraint in cursor.fetchall():
+                if constraint:
+                    cursor.execute('ALTER TABLE {table} DROP CONSTRAINT {constraint}'.format(
+                        table=quote_name(table), constraint=quote_name(constraint)))
+                else:
+                    cursor.execute('DROP INDEX {name}'.format(name=quote_name(name)))
+                cursor.execute('{definition} WHERE {column} IS NOT NULL'.format(
+                    definition=definition, column=quote_name(column)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0008_stagedresource'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artifact',
+            name=column,
+            field=models.CharField(db_index=True, max_length=max_length, null=True,
+                                   unique=unique),
+        ) for column, max_length, unique in OPTIONAL_DIGESTS
+    ] + [
+        migrations.RunPython(partial_digest_indexes, migrations.RunPython.noop),
+    ]
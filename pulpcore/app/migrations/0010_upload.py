@@ -0,0 +1,43 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+import pulpcore.app.models.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0009_artifact_optional_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Upload',
+            fields=[
+                ('_id', models.AutoField(primary_key=True, serialize=False)),
+                ('_created', models.DateTimeField(auto_now_add=True)),
+                ('_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('file', models.FileField(max_length=255,
+                                          upload_to=pulpcore.app.models.storage.get_upload_path)),
+                ('size', models.BigIntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadChunk',
+            fields=[
+                ('_id', models.AutoField(primary_key=True, serialize=False)),
+                ('_created', models.DateTimeField(auto_now_add=True)),
+                ('_last_updated', models.DateTimeField(auto_now=True, null=True)),
+                ('offset', models.BigIntegerField()),
+                ('size', models.BigIntegerField()),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE,
+                                             related_name='chunks', to='pulp_app.Upload')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
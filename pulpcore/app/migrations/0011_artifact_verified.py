@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pulp_app', '0010_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifact',
+            name='verified',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+    ]
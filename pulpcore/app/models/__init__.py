@@ -18,9 +18,18 @@ from .repository import (  # noqa
     Repository,
     RepositoryContent,
     RepositoryVersion,
+    RepositoryVersionContentBitmap,
 )
 
-from .task import CreatedResource, ReservedResource, Task, TaskReservedResource, Worker  # noqa
+from .task import (  # noqa
+    CreatedResource,
+    ReservedResource,
+    StagedResource,
+    Task,
+    TaskReservedResource,
+    Worker,
+)
+from .upload import Upload, UploadChunk  # noqa
 
 # Moved here to avoid a circular import with Task
 from .progress import ProgressBar, ProgressReport, ProgressSpinner  # noqa
@@ -1,16 +1,27 @@
 """
 Content related Django models.
 """
-import hashlib
+from gettext import gettext as _
 
+from django.conf import settings
 from django.core import validators
-from django.db import IntegrityError, models, transaction
+from django.db import models
 from django.forms.models import model_to_dict
+from django.utils import timezone
 
 from itertools import chain
 
+from pulpcore.app.hashing import ParallelHasher
 from pulpcore.app.models import Model, MasterModel, storage, fields
-from pulpcore.exceptions import DigestValidationError, SizeValidationError
+from pulpcore.exceptions import (
+    DigestValidationError,
+    SizeValidationError,
+    UnsupportedDigestValidationError,
+)
+
+
+# The number of objects fetched by each query of BulkCreateManager.bulk_get_or_create()
+FETCH_BATCH_SIZE = 1000
 
 
 class BulkCreateManager(models.Manager):
@@ -22,33 +33,83 @@ class BulkCreateManager(models.Manager):
         """
         Insert the list of objects into the database and get existing objects from the database.
 
-        Do *not* call save() on each of the instances, do not send any pre/post_save signals,
-        and do not set the primary key attribute if it is an autoincrement field (except if
-        features.can_return_ids_from_bulk_insert=True). Multi-table models are not supported.
+        Do *not* call save() on each of the instances, do not send any pre/post_save signals.
+        Multi-table models are not supported.
 
-        If an IntegrityError is raised while performing a bulk insert, this method falls back to
-        inserting each instance individually. The already-existing instances are retrieved from
-        the database and returned with the other newly created instances.
+        The objects are inserted ignoring the ones which conflict with existing rows. Then all
+        the objects are touched and fetched from the database, by the lookup of their ``q()``
+        method, with one query of each per batch. Touching the existing rows protects them from
+        orphan cleanup until they are added to a repository. An object whose lookup doesn't match
+        the row it conflicted with, e.g. an Artifact without a digest the existing row has, is
+        fetched by its unique fields instead.
 
         Args:
             objs (iterable of models.Model): an iterable of Django Model instances
-            batch_size (int): how many are created in a single query
+            batch_size (int): how many are created or fetched in a single query
+
+        Raises:
+            django.core.exceptions.ObjectDoesNotExist: When no row matches an object.
 
         Returns:
-            List of instances that were inserted into the database.
+            List of the instances from the database, in the order of ``objs``.
         """
         objs = list(objs)
-        try:
-            with transaction.atomic():
-                return super().bulk_create(objs, batch_size=batch_size)
-        except IntegrityError:
-            for i in range(len(objs)):
-                try:
-                    with transaction.atomic():
-                        objs[i].save()
-                except IntegrityError:
-                    objs[i] = objs[i].__class__.objects.get(objs[i].q())
-        return objs
+        super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+
+        lookups = [tuple(obj.q().children) for obj in objs]
+        batch_size = batch_size or FETCH_BATCH_SIZE
+        found = {}
+        for start in range(0, len(objs), batch_size):
+            q = models.Q()
+            fields = set()
+            for lookup in lookups[start:start + batch_size]:
+                if lookup:
+                    q |= models.Q(**dict(lookup))
+                    fields.add(tuple(name for name, value in lookup))
+            if not q:
+                continue
+            self.filter(q).update(_last_updated=timezone.now())
+            for instance in self.filter(q):
+                for names in fields:
+                    key = tuple((name, instance.serializable_value(name)) for name in names)
+                    found[key] = instance
+
+        instances = []
+        for lookup, obj in zip(lookups, objs):
+            instance = found.get(lookup)
+            if instance is None:
+                instance = self._get_conflicting(obj)
+            instances.append(instance)
+        return instances
+
+    def _get_conflicting(self, obj):
+        """
+        Fetch the row an object conflicted with, by any of its unique fields.
+
+        Args:
+            obj (models.Model): An object which wasn't inserted.
+
+        Raises:
+            django.core.exceptions.ObjectDoesNotExist: When no row has a unique value of the object.
+
+        Returns:
+            models.Model: The instance from the database.
+        """
+        opts = self.model._meta
+        q = models.Q()
+        for field in opts.local_fields:
+            value = getattr(obj, field.attname)
+            if field.unique and not field.primary_key and value is not None:
+                q |= models.Q(**{field.attname: value})
+        for names in opts.unique_together:
+            values = {opts.get_field(name).attname: getattr(obj, opts.get_field(name).attname)
+                      for name in names}
+            if None not in values.values():
+                q |= models.Q(**values)
+        if not q:
+            raise self.model.DoesNotExist(
+                _('{model} has no unique values to be fetched by.').format(model=opts.object_name))
+        return self.get(q)
 
 
 class QueryMixin:
@@ -91,6 +152,8 @@ class Artifact(Model):
         sha256 (models.CharField): The SHA-256 checksum of the file.
         sha384 (models.CharField): The SHA-384 checksum of the file.
         sha512 (models.CharField): The SHA-512 checksum of the file.
+        verified (models.DateTimeField): When the file was last verified against its sha256
+            checksum.
     """
 
     def storage_path(self, name):
@@ -105,12 +168,13 @@ class Artifact(Model):
 
     file = fields.ArtifactFileField(null=False, upload_to=storage_path, max_length=255)
     size = models.IntegerField(null=False)
-    md5 = models.CharField(max_length=32, null=False, unique=False, db_index=True)
-    sha1 = models.CharField(max_length=40, null=False, unique=False, db_index=True)
-    sha224 = models.CharField(max_length=56, null=False, unique=False, db_index=True)
+    md5 = models.CharField(max_length=32, null=True, unique=False, db_index=True)
+    sha1 = models.CharField(max_length=40, null=True, unique=False, db_index=True)
+    sha224 = models.CharField(max_length=56, null=True, unique=False, db_index=True)
     sha256 = models.CharField(max_length=64, null=False, unique=True, db_index=True)
-    sha384 = models.CharField(max_length=96, null=False, unique=True, db_index=True)
-    sha512 = models.CharField(max_length=128, null=False, unique=True, db_index=True)
+    sha384 = models.CharField(max_length=96, null=True, unique=True, db_index=True)
+    sha512 = models.CharField(max_length=128, null=True, unique=True, db_index=True)
+    verified = models.DateTimeField(null=True, db_index=True)
 
     objects = BulkCreateManager()
 
@@ -127,10 +191,19 @@ class Artifact(Model):
     # Reliable digest fields ordered by algorithm strength.
     RELIABLE_DIGEST_FIELDS = DIGEST_FIELDS[:-3]
 
+    @classmethod
+    def allowed_digest_fields(cls):
+        """
+        Returns:
+            tuple: The digest fields in the ALLOWED_CONTENT_CHECKSUMS setting, ordered by
+                algorithm strength. The others aren't computed and are null.
+        """
+        return tuple(f for f in cls.DIGEST_FIELDS if f in settings.ALLOWED_CONTENT_CHECKSUMS)
+
     def q(self):
         if self.pk:
             return models.Q(pk=self.pk)
-        for digest_name in self.DIGEST_FIELDS:
+        for digest_name in self.allowed_digest_fields():
             digest_value = getattr(self, digest_name)
             if digest_value:
                 return models.Q(**{digest_name: digest_value})
@@ -199,23 +272,21 @@ class Artifact(Model):
         Raises:
             :class:`~pulpcore.exceptions.DigestValidationError`: When any of the ``expected_digest``
                 values don't match the digest of the data
+            :class:`~pulpcore.exceptions.UnsupportedDigestValidationError`: When an uploaded file
+                is expected to have a digest which isn't in ALLOWED_CONTENT_CHECKSUMS
             :class:`~pulpcore.exceptions.SizeValidationError`: When the ``expected_size`` value
                 doesn't match the size of the data
 
         Returns:
             An in-memory, unsaved :class:`~pulpcore.plugin.models.Artifact`
         """
+        digest_fields = Artifact.allowed_digest_fields()
         if isinstance(file, str):
+            # Expected digests are validated even when they aren't stored
+            hasher = ParallelHasher(set(digest_fields).union(expected_digests or ()))
             with open(file, 'rb') as f:
-                hashers = {n: hashlib.new(n) for n in Artifact.DIGEST_FIELDS}
-                size = 0
-                while True:
-                    chunk = f.read(1048576)  # 1 megabyte
-                    if not chunk:
-                        break
-                    for algorithm in hashers.values():
-                        algorithm.update(chunk)
-                    size = size + len(chunk)
+                size = hasher.update_from_file(f)
+            hashers = hasher.hashers
         else:
             size = file.size
             hashers = file.hashers
@@ -226,11 +297,13 @@ class Artifact(Model):
 
         if expected_digests:
             for algorithm, expected_digest in expected_digests.items():
+                if algorithm not in hashers:
+                    raise UnsupportedDigestValidationError()
                 if expected_digest != hashers[algorithm].hexdigest():
                     raise DigestValidationError()
 
         attributes = {'size': size, 'file': file}
-        for algorithm in Artifact.DIGEST_FIELDS:
+        for algorithm in digest_fields:
             attributes[algorithm] = hashers[algorithm].hexdigest()
 
         return Artifact(**attributes)
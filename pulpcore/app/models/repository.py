@@ -2,16 +2,23 @@
 Repository related Django models.
 """
 from contextlib import suppress
-from django.db import models
+from itertools import islice
+from django.db import connection, models
 from django.db import transaction
+from django.utils import timezone
 
 from .base import Model, MasterModel
 from .content import Content
 from .task import CreatedResource
 
+from pulpcore.app.bitmap import ContentBitmap
+from pulpcore.app.fields import JSONField
 from pulpcore.app.models.storage import get_tls_path
 from pulpcore.exceptions import ResourceImmutableError
 
+# The maximum number of content units handled by each statement of add_content() and _reconcile()
+CONTENT_CHUNK_SIZE = 10000
+
 
 class Repository(Model):
     """
@@ -24,6 +31,9 @@ class Repository(Model):
         last_version (models.PositiveIntegerField): A record of the last created version number.
             Used when a repository version is deleted so as not to create a new vesrion with the
             same version number.
+        retained_versions (models.PositiveIntegerField): The number of most recent versions to
+            keep. Older versions are squashed when a new version is completed. All versions are
+            kept when null.
 
     Relations:
 
@@ -32,6 +42,7 @@ class Repository(Model):
     name = models.CharField(db_index=True, unique=True, max_length=255)
     description = models.TextField()
     last_version = models.PositiveIntegerField(default=0)
+    retained_versions = models.PositiveIntegerField(null=True)
     content = models.ManyToManyField('Content', through='RepositoryContent',
                                      related_name='repositories')
 
@@ -47,6 +58,50 @@ class Repository(Model):
         """
         return (self.name,)
 
+    def squash_old_versions(self):
+        """
+        Squash the versions older than the last ``retained_versions`` complete versions.
+
+        Each run of consecutive expired versions is squashed into the version following it in a
+        single pass. Versions referenced by a Publication are kept.
+        """
+        if not self.retained_versions:
+            return
+
+        versions = list(self.versions.filter(complete=True).order_by('number'))
+        published = self.versions.filter(publication__isnull=False).values_list('pk', flat=True)
+        published = set(published)
+        expired = len(versions) - self.retained_versions
+        if expired <= 0:
+            return
+        run = []
+        for index, version in enumerate(versions[:expired]):
+            if version.pk not in published:
+                run.append(version)
+            following = versions[index + 1]
+            if run and (index + 1 == expired or following.pk in published):
+                self._squash_versions(run, following)
+                run = []
+
+    def _squash_versions(self, versions, next_version):
+        """
+        Squash consecutive complete versions into the next version and delete them.
+
+        Args:
+            versions (list): Of consecutive pulpcore.app.models.RepositoryVersion to squash.
+            next_version (pulpcore.app.models.RepositoryVersion): The complete version following
+                the last of ``versions``.
+        """
+        with transaction.atomic():
+            repo_relations = RepositoryContent.objects.filter(repository=self)
+            RepositoryVersion._squash_range(repo_relations, versions[0].number,
+                                            versions[-1].number, next_version)
+            next_version.content_added_summary = next_version._summarize(next_version.added())
+            next_version.content_removed_summary = next_version._summarize(
+                next_version.removed())
+            next_version.save()
+            RepositoryVersion.objects.filter(pk__in=[v.pk for v in versions]).delete()
+
 
 class Remote(MasterModel):
     """
@@ -169,6 +224,11 @@ class RepositoryContent(Model):
     Fields:
 
         created (models.DatetimeField): When the association was created.
+        number_added (models.PositiveIntegerField): The number of the RepositoryVersion which added
+            the referenced Content. Denormalized from version_added so version membership can be
+            queried without joining RepositoryVersion.
+        number_removed (models.PositiveIntegerField): The number of the RepositoryVersion which
+            removed the referenced Content. Denormalized from version_removed.
 
     Relations:
 
@@ -187,10 +247,16 @@ class RepositoryContent(Model):
     version_removed = models.ForeignKey('RepositoryVersion', null=True,
                                         related_name='removed_memberships',
                                         on_delete=models.CASCADE)
+    number_added = models.PositiveIntegerField()
+    number_removed = models.PositiveIntegerField(null=True)
 
     class Meta:
         unique_together = (('repository', 'content', 'version_added'),
                            ('repository', 'content', 'version_removed'))
+        indexes = [
+            models.Index(fields=['repository', 'number_added', 'number_removed'],
+                         name='pulp_app_rc_number_range_idx'),
+        ]
 
 
 class RepositoryVersion(Model):
@@ -215,6 +281,12 @@ class RepositoryVersion(Model):
         action  (models.TextField): The action that produced the version.
         complete (models.BooleanField): If true, the RepositoryVersion is visible. This field is set
             to true when the task that creates the RepositoryVersion is complete.
+        content_summary (pulpcore.app.fields.JSONField): The count of each type of content
+            contained within the version. Set when the version is completed.
+        content_added_summary (pulpcore.app.fields.JSONField): The count of each type of content
+            added by the version. Set when the version is completed.
+        content_removed_summary (pulpcore.app.fields.JSONField): The count of each type of content
+            removed by the version. Set when the version is completed.
 
     Relations:
 
@@ -225,6 +297,12 @@ class RepositoryVersion(Model):
     complete = models.BooleanField(db_index=True, default=False)
     base_version = models.ForeignKey('RepositoryVersion', null=True,
                                      on_delete=models.SET_NULL)
+    content_summary = JSONField(null=True)
+    content_added_summary = JSONField(null=True)
+    content_removed_summary = JSONField(null=True)
+
+    # The bitmap of a complete (immutable) version, cached by content_bitmap().
+    _content_bitmap = None
 
     class Meta:
         default_related_name = 'versions'
@@ -251,36 +329,191 @@ class RepositoryVersion(Model):
             >>>     ...
             >>>
         """
-        relationships = RepositoryContent.objects.filter(
-            repository=self.repository, version_added__number__lte=self.number
-        ).exclude(
-            version_removed__number__lte=self.number
+        relationships = self._content_relationships()
+        return Content.objects.filter(pk__in=relationships.values('content_id'))
+
+    def _content_relationships(self):
+        """
+        Returns the memberships of the content contained within this version.
+
+        Membership is a range predicate on the denormalized version numbers of RepositoryContent
+        so no join to RepositoryVersion is needed.
+
+        Returns:
+            django.db.models.QuerySet: The RepositoryContent for this version.
+        """
+        return RepositoryContent.objects.filter(self._membership_q())
+
+    def _membership_q(self, prefix=''):
+        """
+        Args:
+            prefix (str): The lookup path from the filtered model to RepositoryContent, e.g.
+                'content__version_memberships__', to match through a join.
+
+        Returns:
+            django.db.models.Q: Matches the RepositoryContent of the content in this version.
+        """
+        return (
+            models.Q(**{prefix + 'repository_id': self.repository_id,
+                        prefix + 'number_added__lte': self.number}) &
+            (models.Q(**{prefix + 'number_removed__isnull': True}) |
+             models.Q(**{prefix + 'number_removed__gt': self.number}))
         )
-        return Content.objects.filter(version_memberships__in=relationships)
+
+    def content_diff(self, base_version):
+        """
+        Returns the difference between the content of base_version and of this version.
+
+        Content is added when it is contained within this version but not within base_version,
+        and removed when it is contained within base_version but not within this version. The
+        versions may belong to different repositories.
+
+        The difference is computed in a single query grouping the memberships of both versions by
+        content, so neither content set is materialized.
+
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): The version to compare to.
+
+        Returns:
+            django.db.models.QuerySet: Of dicts with the 'content_id', 'content___type' and
+                'added' (1 when added, 0 when removed) keys, ordered by 'content_id'.
+        """
+        in_version = self._membership_q()
+        in_base = base_version._membership_q()
+        return RepositoryContent.objects.filter(in_version | in_base).values(
+            'content_id', 'content___type'
+        ).annotate(
+            added=models.Max(models.Case(models.When(in_version, then=models.Value(1)),
+                                         default=models.Value(0),
+                                         output_field=models.IntegerField())),
+            removed=models.Max(models.Case(models.When(in_base, then=models.Value(1)),
+                                           default=models.Value(0),
+                                           output_field=models.IntegerField())),
+        ).exclude(added=models.F('removed')).values(
+            'content_id', 'content___type', 'added'
+        ).order_by('content_id')
 
     def added(self):
         """
         Returns:
             QuerySet: The Content objects that were added by this version.
         """
-        return Content.objects.filter(version_memberships__version_added=self)
+        return Content.objects.filter(version_memberships__repository_id=self.repository_id,
+                                      version_memberships__version_added=self)
 
     def removed(self):
         """
         Returns:
             QuerySet: The Content objects that were removed by this version.
         """
-        return Content.objects.filter(version_memberships__version_removed=self)
+        return Content.objects.filter(version_memberships__repository_id=self.repository_id,
+                                      version_memberships__version_removed=self)
 
     def contains(self, content):
         """
         Check whether a content exists in this repository version's set of content
 
+        The bitmap of complete versions is used so repeated checks don't query the database.
+
         Returns:
             bool: True if the repository version contains the content, False otherwise
         """
+        if self.complete:
+            return content.pk in self.content_bitmap()
         return self.content.filter(pk=content.pk).exists()
 
+    def content_bitmap(self):
+        """
+        Returns a bitmap of the primary keys of the content contained within this version.
+
+        The bitmap of a complete version is stored when the version is completed. Otherwise it is
+        built from the bitmap of the previous version plus the content added and minus the content
+        removed by this version. It is only built from the whole content set when no previous
+        bitmap is stored, and it is then stored for complete versions.
+
+        Examples:
+            >>> only_in_v2 = v2.content_bitmap() - v1.content_bitmap()
+            >>> in_both = v2.content_bitmap() & v1.content_bitmap()
+            >>> v1.content_bitmap() <= v2.content_bitmap()  # containment
+
+        Returns:
+            pulpcore.app.bitmap.ContentBitmap: The content contained within this version.
+        """
+        if self._content_bitmap is not None:
+            return self._content_bitmap
+
+        with suppress(RepositoryVersionContentBitmap.DoesNotExist):
+            stored = RepositoryVersionContentBitmap.objects.get(repository_version=self)
+            bitmap = ContentBitmap.from_bytes(stored.bitmap)
+            if self.complete:
+                self._content_bitmap = bitmap
+            return bitmap
+
+        bitmap = self._build_content_bitmap()
+        if self.complete:
+            RepositoryVersionContentBitmap.objects.create(repository_version=self,
+                                                          bitmap=bitmap.to_bytes())
+            self._content_bitmap = bitmap
+        return bitmap
+
+    def _build_content_bitmap(self):
+        """
+        Build the bitmap of this version incrementally from the previous version when possible.
+
+        Returns:
+            pulpcore.app.bitmap.ContentBitmap: The content contained within this version.
+        """
+        previous = self.repository.versions.filter(
+            complete=True, number__lt=self.number).order_by('-number').first()
+        if previous:
+            with suppress(RepositoryVersionContentBitmap.DoesNotExist):
+                stored = RepositoryVersionContentBitmap.objects.get(repository_version=previous)
+                # Content removed and added back by this version has a row of each kind
+                relations = RepositoryContent.objects.filter(repository_id=self.repository_id)
+                added = ContentBitmap.from_pks(relations.filter(
+                    version_added=self, version_removed=None
+                ).values_list('content_id', flat=True).iterator())
+                removed = ContentBitmap.from_pks(relations.filter(
+                    version_removed=self
+                ).exclude(version_added=self).values_list('content_id', flat=True).iterator())
+                return (ContentBitmap.from_bytes(stored.bitmap) - removed) | added
+        return ContentBitmap.from_pks(self.content.values_list('pk', flat=True).iterator())
+
+    def summarize_content(self):
+        """
+        Compute the content summaries of this version.
+
+        The counts of content added and removed are aggregated by the database. The count of
+        contained content is derived from the summary of the previous complete version when it is
+        stored, otherwise it is aggregated over the whole content set.
+        """
+        self.content_added_summary = self._summarize(self.added())
+        self.content_removed_summary = self._summarize(self.removed())
+
+        previous = self.repository.versions.filter(
+            complete=True, number__lt=self.number).order_by('-number').first()
+        if previous and previous.content_summary is not None:
+            summary = dict(previous.content_summary)
+            for _type, count in self.content_added_summary.items():
+                summary[_type] = summary.get(_type, 0) + count
+            for _type, count in self.content_removed_summary.items():
+                summary[_type] = summary.get(_type, 0) - count
+            self.content_summary = {_type: count for _type, count in summary.items() if count}
+        else:
+            self.content_summary = self._summarize(self.content)
+
+    @staticmethod
+    def _summarize(content):
+        """
+        Args:
+            content (django.db.models.QuerySet): Set of Content to summarize.
+
+        Returns:
+            dict: of {<_type>: <count>}
+        """
+        annotated = content.order_by().values('_type').annotate(count=models.Count('_type'))
+        return {c['_type']: c['count'] for c in annotated}
+
     @classmethod
     def create(cls, repository, base_version=None):
         """
@@ -306,15 +539,83 @@ class RepositoryVersion(Model):
             version.save()
 
             if base_version:
-                # first remove the content that isn't in the base version
-                version.remove_content(version.content.exclude(pk__in=base_version.content))
-                # now add any content that's in the base_version but not in version
-                version.add_content(base_version.content.exclude(pk__in=version.content))
+                version._reconcile(base_version)
 
             resource = CreatedResource(content_object=version)
             resource.save()
             return version
 
+    def _reconcile(self, base_version):
+        """
+        Make the content of this new version the content of base_version.
+
+        The difference is computed once from the content bitmaps of both versions. The content
+        which isn't in base_version is then removed with bulk updates, and the content which is
+        only in base_version is added with bulk inserts, of CONTENT_CHUNK_SIZE units each.
+
+        Args:
+            base_version (pulpcore.app.models.RepositoryVersion): The version whose content
+                becomes the content of this version.
+        """
+        current = self.content_bitmap()
+        base = base_version.content_bitmap()
+
+        to_remove = iter(current - base)
+        while True:
+            chunk = list(islice(to_remove, CONTENT_CHUNK_SIZE))
+            if not chunk:
+                break
+            RepositoryContent.objects.filter(
+                repository_id=self.repository_id,
+                content_id__in=chunk,
+                version_removed=None
+            ).update(version_removed=self, number_removed=self.number)
+
+        to_add = iter(base - current)
+        while True:
+            chunk = list(islice(to_add, CONTENT_CHUNK_SIZE))
+            if not chunk:
+                break
+            RepositoryContent.objects.bulk_create(
+                [RepositoryContent(repository_id=self.repository_id, content_id=pk,
+                                   version_added=self, number_added=self.number)
+                 for pk in chunk]
+            )
+
+    @classmethod
+    def clone(cls, repository, source):
+        """
+        Create a complete first version of a new repository with the content of another version.
+
+        The memberships of ``source`` are copied with a single INSERT ... SELECT statement and
+        its content summary and bitmap are copied too, so no content is read by the worker.
+        Creation of a RepositoryVersion should be done in a RQ Job.
+
+        Args:
+            repository (pulpcore.app.models.Repository): A new repository without versions.
+            source (pulpcore.app.models.RepositoryVersion): The complete version to copy.
+
+        Returns:
+            pulpcore.app.models.RepositoryVersion: The Created RepositoryVersion
+        """
+        content_summary = source.content_summary
+        if content_summary is None:
+            content_summary = cls._summarize(source.content)
+        bitmap = source.content_bitmap()
+
+        with transaction.atomic():
+            version = cls.create(repository)
+            version._insert_memberships(source._content_relationships(), field='content')
+            version.content_summary = content_summary
+            version.content_added_summary = content_summary
+            version.content_removed_summary = {}
+            version.complete = True
+            version.save()
+            RepositoryVersionContentBitmap.objects.create(repository_version=version,
+                                                          bitmap=bitmap.to_bytes())
+        version._content_bitmap = bitmap
+        return version
+
     @staticmethod
     def latest(repository):
         """
@@ -347,12 +648,19 @@ class RepositoryVersion(Model):
         except IndexError:
             raise self.DoesNotExist
 
-    def add_content(self, content):
+    def add_content(self, content, progress_bar=None):
         """
         Add a content unit to this version.
 
+        The content is added by the database using INSERT ... SELECT statements. Each statement
+        handles at most CONTENT_CHUNK_SIZE units of ``content`` so neither the worker memory nor a
+        single statement grows with the size of ``content``. The chunks are found by walking the
+        primary keys of ``content`` from the last primary key of the previous chunk.
+
         Args:
            content (django.db.models.QuerySet): Set of Content to add
+           progress_bar (pulpcore.app.models.ProgressBar): An optional progress bar which is
+               incremented by the number of units added.
 
         Raise:
             pulpcore.exception.ResourceImmutableError: if add_content is called on a
@@ -361,24 +669,73 @@ class RepositoryVersion(Model):
         if self.complete:
             raise ResourceImmutableError(self)
 
-        repo_content = []
-        for content_pk in content.exclude(pk__in=self.content).values_list('pk', flat=True):
-            repo_content.append(
-                RepositoryContent(
-                    repository=self.repository,
-                    content_id=content_pk,
-                    version_added=self
-                )
-            )
+        last_pk = None
+        while True:
+            chunk = content.order_by('pk')
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list('pk', flat=True)[:CONTENT_CHUNK_SIZE])
+            if not pks:
+                break
+
+            candidates = Content.objects.filter(pk__in=content, pk__gte=pks[0], pk__lte=pks[-1])
+            added = self._insert_memberships(candidates.exclude(pk__in=self.content))
+
+            if progress_bar and added:
+                progress_bar.done += added
+                progress_bar.save()
+            if len(pks) < CONTENT_CHUNK_SIZE:
+                break
+            last_pk = pks[-1]
+
+    def _insert_memberships(self, content, field='pk'):
+        """
+        Add content to this version with a single INSERT ... SELECT statement.
+
+        Args:
+            content (django.db.models.QuerySet): Set of Content to add. It must not contain any
+                content which is already contained within this version.
+            field (str): The field of the model of ``content`` holding the content primary key,
+                e.g. 'content' to add the content of a set of RepositoryContent.
 
-        RepositoryContent.objects.bulk_create(repo_content)
+        Returns:
+            int: The number of content units added.
+        """
+        quote_name = connection.ops.quote_name
+        fields = ('_created', '_last_updated', 'repository', 'content', 'version_added',
+                  'number_added')
+        columns = ', '.join(
+            quote_name(RepositoryContent._meta.get_field(f).column) for f in fields)
+        if field == 'pk':
+            column = content.model._meta.pk.column
+        else:
+            column = content.model._meta.get_field(field).column
+        select, select_params = content.order_by().values(field).query.sql_with_params()
+        sql = (
+            'INSERT INTO {table} ({columns}) '
+            'SELECT %s, %s, %s, candidates.{column}, %s, %s FROM ({select}) candidates'
+        ).format(
+            table=quote_name(RepositoryContent._meta.db_table),
+            columns=columns,
+            column=quote_name(column),
+            select=select,
+        )
+        now = timezone.now()
+        params = [now, now, self.repository_id, self.pk, self.number] + list(select_params)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
 
-    def remove_content(self, content):
+    def remove_content(self, content, progress_bar=None):
         """
         Remove content from the repository.
 
+        The content is removed by the database using a single UPDATE statement.
+
         Args:
             content (django.db.models.QuerySet): Set of Content to remove
+            progress_bar (pulpcore.app.models.ProgressBar): An optional progress bar which is
+                incremented by the number of units removed.
 
         Raise:
             pulpcore.exception.ResourceImmutableError: if remove_content is called on a
@@ -392,36 +749,64 @@ class RepositoryVersion(Model):
             repository=self.repository,
             content_id__in=content,
             version_removed=None)
-        q_set.update(version_removed=self)
+        removed = q_set.update(version_removed=self, number_removed=self.number)
+
+        if progress_bar and removed:
+            progress_bar.done += removed
+            progress_bar.save()
 
     def _squash(self, repo_relations, next_version):
         """
         Squash a complete repo version into the next version
         """
-        # delete any relationships added in the version being deleted and removed in the next one.
-        repo_relations.filter(version_added=self, version_removed=next_version).delete()
+        self._squash_range(repo_relations, self.number, self.number, next_version)
 
-        # If the same content is deleted in version, but added back in next_version
-        # set version_removed field in relation to None, and remove relation adding the content
-        # in next_version
-        content_added = repo_relations.filter(version_added=next_version).values_list('content_id')
-
-        # use list() to force the evaluation of the queryset, otherwise queryset is affected
-        # by the update() operation before delete() is ran
-        content_removed_and_readded = list(repo_relations.filter(version_removed=self,
-                                                                 content_id__in=content_added)
-                                           .values_list('content_id'))
+    @staticmethod
+    def _squash_range(repo_relations, first, last, next_version):
+        """
+        Squash consecutive complete repo versions into the next version.
 
-        repo_relations.filter(version_removed=self,
-                              content_id__in=content_removed_and_readded)\
-            .update(version_removed=None)
+        The changes of every version numbered from ``first`` to ``last`` are merged into
+        ``next_version`` with range predicates on the version numbers, so the number of statements
+        doesn't depend on the number of versions squashed.
 
-        repo_relations.filter(version_added=next_version,
-                              content_id__in=content_removed_and_readded).delete()
+        Args:
+            repo_relations (django.db.models.QuerySet): The RepositoryContent of the repository.
+            first (int): The number of the first version to squash.
+            last (int): The number of the last version to squash.
+            next_version (pulpcore.app.models.RepositoryVersion): The complete version following
+                the version numbered ``last``.
+        """
+        squashed = (first, last)
+
+        # delete any relationships added in the squashed versions and removed by the next one.
+        repo_relations.filter(number_added__range=squashed,
+                              number_removed__lte=next_version.number).delete()
+
+        # If the same content is removed in the squashed versions, but added back by them or by
+        # next_version, the relation removing it takes over the removal of the relation adding
+        # it back. The relation adding it back is deleted first, both can't share the removing
+        # version. Use list() to force the evaluation of the queryset, otherwise it is affected
+        # by the delete() before the update() operations are ran.
+        removed = repo_relations.filter(number_removed__range=squashed).values('content_id')
+        readded = list(repo_relations.filter(
+            number_added__range=(first, next_version.number), content_id__in=removed
+        ).values_list('pk', 'content_id', 'version_removed_id', 'number_removed'))
+
+        repo_relations.filter(pk__in=[r[0] for r in readded]).delete()
+
+        removals = {}
+        for pk, content_id, version_removed_id, number_removed in readded:
+            removals.setdefault((version_removed_id, number_removed), []).append(content_id)
+        for (version_removed_id, number_removed), content_ids in removals.items():
+            repo_relations.filter(number_removed__range=squashed, content_id__in=content_ids) \
+                .update(version_removed_id=version_removed_id, number_removed=number_removed)
 
         # "squash" by moving other additions and removals forward to the next version
-        repo_relations.filter(version_added=self).update(version_added=next_version)
-        repo_relations.filter(version_removed=self).update(version_removed=next_version)
+        repo_relations.filter(number_added__range=squashed).update(
+            version_added=next_version, number_added=next_version.number)
+        repo_relations.filter(number_removed__range=squashed).update(
+            version_removed=next_version, number_removed=next_version.number)
 
     def delete(self, **kwargs):
         """
@@ -438,19 +823,24 @@ class RepositoryVersion(Model):
             try:
                 next_version = self.next()
                 self._squash(repo_relations, next_version)
+                next_version.content_added_summary = self._summarize(next_version.added())
+                next_version.content_removed_summary = self._summarize(next_version.removed())
+                next_version.save()
 
             except RepositoryVersion.DoesNotExist:
                 # version is the latest version so simply update repo contents
                 # and delete the version
                 repo_relations.filter(version_added=self).delete()
-                repo_relations.filter(version_removed=self).update(version_removed=None)
+                repo_relations.filter(version_removed=self).update(version_removed=None,
+                                                                   number_removed=None)
             super().delete(**kwargs)
 
         else:
             with transaction.atomic():
-                RepositoryContent.objects.filter(version_added=self).delete()
-                RepositoryContent.objects.filter(version_removed=self) \
-                    .update(version_removed=None)
+                repo_relations = RepositoryContent.objects.filter(repository=self.repository)
+                repo_relations.filter(version_added=self).delete()
+                repo_relations.filter(version_removed=self) \
+                    .update(version_removed=None, number_removed=None)
                 CreatedResource.objects.filter(object_id=self.pk).delete()
                 self.repository.last_version = self.number - 1
                 self.repository.save()
@@ -472,5 +862,32 @@ class RepositoryVersion(Model):
         if exc_value:
             self.delete()
         else:
-            self.complete = True
-            self.save()
+            with transaction.atomic():
+                bitmap = self._build_content_bitmap()
+                self.summarize_content()
+                self.complete = True
+                self.save()
+                RepositoryVersionContentBitmap.objects.create(repository_version=self,
+                                                              bitmap=bitmap.to_bytes())
+            self._content_bitmap = bitmap
+            self.repository.squash_old_versions()
+
+
+class RepositoryVersionContentBitmap(Model):
+    """
+    A compressed bitmap of the primary keys of the content contained within a RepositoryVersion.
+
+    Stored when the version is completed so set algebra between versions doesn't need queries.
+    See :meth:`RepositoryVersion.content_bitmap`.
+
+    Fields:
+
+        bitmap (models.BinaryField): The compressed bitmap.
+
+    Relations:
+
+        repository_version (models.OneToOneField): The associated repository version.
+    """
+    repository_version = models.OneToOneField(RepositoryVersion, on_delete=models.CASCADE,
+                                              related_name='content_bitmap_index')
+    bitmap = models.BinaryField()
@@ -1,12 +1,26 @@
 import os
 import errno
+import shutil
+import tempfile
 
 from uuid import uuid4
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 from django.conf import settings
 from django.core.files import File
 from django.core.files.storage import FileSystemStorage
 
+# The ioctl cloning a file on copy-on-write filesystems, e.g. XFS and Btrfs (linux/fs.h)
+FICLONE = 0x40049409
+
+# The errors of a copy method which isn't supported for a pair of files
+UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY,
+                      errno.EBADF)
+
 
 class FileSystem(FileSystemStorage):
     """
@@ -47,9 +61,8 @@ class FileSystem(FileSystemStorage):
     TemporaryUploadedFile
     ------------------------------
     1) is name available?
-         2a) yes, os.rename()
-                 3a) no exception, you are done
-                 3b) exception, copy from source to destination using python and delete the original
+         2a) yes, place the file with :func:`move_file`, which never copies the data through
+             python and never leaves a partial file at the destination
          2b) no, the file already exists. keep the existing file in place.
 
     File
@@ -58,13 +71,7 @@ class FileSystem(FileSystemStorage):
          2a) yes, copy from source to destination using python
          2b) no, the file already exists. keep the existing file in place.
 
-    The difference between the two save() methods is in the behavior at 2b.
-
-    The non-atomic nature of 3b makes it possible for corrupted Artifacts to be saved if
-    /var/lib/pulp/tmp and /var/lib/pulp/artifact are on separate filesystems. An interrupted save()
-    operation will result in a partial file being placed into /var/lib/pulp/artifact. In such
-    situations, Pulp will not be able to replace the file with the correct version in the
-    future and the user will have to manually remove the partial file.
+    The difference between the two save() methods is in the behavior at 2a and 2b.
     """
 
     def get_available_name(self, name, max_length=None):
@@ -106,7 +113,13 @@ class FileSystem(FileSystemStorage):
 
         try:
             name = self.get_available_name(name, max_length=max_length)
-            return self._save(name, content)
+            if not hasattr(content, 'temporary_file_path'):
+                return self._save(name, content)
+            full_path = self.path(name)
+            move_file(content.temporary_file_path(), full_path)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+            return name
         except OSError as e:
             if e.errno == errno.EEXIST:
                 return name
@@ -114,6 +127,195 @@ class FileSystem(FileSystemStorage):
                 raise
 
 
+def move_file(source, destination, replace=False):
+    """
+    Move a file without copying its data in python, and atomically.
+
+    The file is renamed over the destination when ``replace`` is set and both paths are on the
+    same filesystem. Otherwise the file is placed with :func:`link_file`. The source is removed
+    if possible, also when an existing destination was kept.
+
+    Args:
+        source (str): The path of the file to move.
+        destination (str): The path the file is moved to.
+        replace (bool): Whether an existing destination is replaced.
+
+    Returns:
+        bool: Whether the file was placed, False when an existing destination was kept.
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    if replace:
+        try:
+            os.rename(source, destination)
+            return True
+        except OSError:
+            pass
+
+    placed = link_file(source, destination, replace=replace)
+    try:
+        os.remove(source)
+    except OSError:
+        pass
+    return placed
+
+
+def link_file(source, destination, replace=False):
+    """
+    Place a copy of a file without copying its data in python, and atomically.
+
+    The file is hardlinked, cloned on copy-on-write filesystems, or copied by the kernel with
+    copy_file_range() or sendfile(), in that order of preference. Clones and copies are written
+    next to the destination and moved into place once complete, so an interrupted copy never
+    leaves a partial file at the destination. An existing destination is kept, unless
+    ``replace`` is set.
+
+    Args:
+        source (str): The path of the file to copy.
+        destination (str): The path the file is copied to.
+        replace (bool): Whether an existing destination is replaced. The file isn't hardlinked
+            then, since a hardlink can't replace a file.
+
+    Returns:
+        bool: Whether the file was placed, False when an existing destination was kept.
+    """
+    directory = os.path.dirname(destination)
+    os.makedirs(directory, exist_ok=True)
+    if not replace:
+        try:
+            os.link(source, destination)
+            return True
+        except FileExistsError:
+            return False
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS + (errno.EPERM, errno.EMLINK):
+                raise
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.')
+    try:
+        with open(source, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            if not _clone(src, dst):
+                _copy(src, dst)
+        shutil.copymode(source, temp_path)
+        placed = _place(temp_path, destination, replace)
+    finally:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+    return placed
+
+
+def _place(temp_path, destination, replace):
+    """
+    Put a complete copy of a file at its destination.
+
+    The copy is renamed over the destination when ``replace`` is set. Otherwise it's hardlinked
+    so an existing destination is kept, and renamed only when the filesystem doesn't support
+    hardlinks and there's no destination yet.
+
+    Args:
+        temp_path (str): The path of the copy, next to the destination.
+        destination (str): The path the copy is placed at.
+        replace (bool): Whether an existing destination is replaced.
+
+    Returns:
+        bool: Whether the copy was placed, False when an existing destination was kept.
+    """
+    if not replace:
+        try:
+            os.link(temp_path, destination)
+            return True
+        except FileExistsError:
+            return False
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS + (errno.EPERM, errno.EMLINK):
+                raise
+        if os.path.lexists(destination):
+            return False
+    os.rename(temp_path, destination)
+    return True
+
+
+def _clone(src, dst):
+    """
+    Clone a file, sharing its data, on a copy-on-write filesystem.
+
+    Args:
+        src (file): The source file opened for reading.
+        dst (file): The empty destination file opened for writing.
+
+    Returns:
+        bool: Whether the file was cloned.
+    """
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _copy(src, dst):
+    """
+    Copy a file in the kernel, falling back to python when the kernel can't.
+
+    Args:
+        src (file): The source file opened for reading.
+        dst (file): The empty destination file opened for writing.
+    """
+    size = os.fstat(src.fileno()).st_size
+    for copy in (_copy_file_range, _sendfile):
+        try:
+            copy(src.fileno(), dst.fileno(), size)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+        os.lseek(dst.fileno(), 0, os.SEEK_SET)
+        os.ftruncate(dst.fileno(), 0)
+    src.seek(0)
+    shutil.copyfileobj(src, dst)
+
+
+def _copy_file_range(src_fd, dst_fd, size):
+    """
+    Copy a file with copy_file_range(), which copies on the storage device when it can.
+
+    Args:
+        src_fd (int): The source file descriptor.
+        dst_fd (int): The destination file descriptor.
+        size (int): The number of bytes to copy.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, 'copy_file_range() is not available')
+    offset = 0
+    while offset < size:
+        copied = os.copy_file_range(src_fd, dst_fd, size - offset, offset, offset)
+        if not copied:
+            break
+        offset += copied
+
+
+def _sendfile(src_fd, dst_fd, size):
+    """
+    Copy a file with sendfile(), which copies in the kernel.
+
+    Args:
+        src_fd (int): The source file descriptor.
+        dst_fd (int): The destination file descriptor.
+        size (int): The number of bytes to copy.
+    """
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+        if not sent:
+            break
+        offset += sent
+
+
 def get_artifact_path(sha256digest):
     """
     Determine the absolute path where a file backing the Artifact should be stored.
@@ -128,6 +330,23 @@ def get_artifact_path(sha256digest):
     return os.path.join(settings.MEDIA_ROOT, 'artifact', sha256digest[0:2], sha256digest[2:])
 
 
+def get_upload_path(model, name):
+    """
+    Determine storage location as: MEDIA_ROOT/upload/<uuid>.
+
+    Uploads are stored on the same filesystem as Artifacts so they are hardlinked into place when
+    they are committed.
+
+    Args:
+        model (pulpcore.app.models.Upload): A model instance.
+        name (str): The (unused) input file path.
+
+    Returns:
+        str: An absolute path
+    """
+    return os.path.join(settings.MEDIA_ROOT, 'upload', str(uuid4()))
+
+
 def published_metadata_path(model, name):
     """
     Get the storage path for published metadata.
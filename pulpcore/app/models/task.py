@@ -13,13 +13,24 @@ from rq.job import get_current_job
 
 from pulpcore.app.models import Model, GenericRelationModel
 from pulpcore.app.fields import JSONField
-from pulpcore.constants import TASK_FINAL_STATES, TASK_CHOICES, TASK_STATES
+from pulpcore.constants import (
+    TASK_FINAL_STATES,
+    TASK_CHOICES,
+    TASK_INCOMPLETE_STATES,
+    TASK_STATES,
+)
 from pulpcore.exceptions import exception_to_dict
 from pulpcore.tasking.constants import TASKING_CONSTANTS
 
 
 _logger = logging.getLogger(__name__)
 
+# The number of primary keys inserted by each statement of StagedResource.stage()
+STAGE_BATCH_SIZE = 5000
+
+# How long before the creation of its task a set of staged primary keys can have been staged
+STAGE_EXPIRATION = timedelta(hours=1)
+
 
 class ReservedResource(Model):
     """
@@ -368,3 +379,85 @@ class CreatedResource(GenericRelationModel):
         default=Task.current,
         on_delete=models.CASCADE
     )
+
+
+class StagedResource(Model):
+    """
+    A primary key staged out-of-band as part of a task argument.
+
+    Large sets of primary keys are staged in the DB instead of being pickled into the RQ job, and
+    the task is passed the id of the set. The task can then join against the staged set instead of
+    filtering with a potentially huge list.
+
+    Fields:
+
+        set_id (models.UUIDField): The id of the set of staged primary keys.
+        object_id (models.PositiveIntegerField): The staged primary key.
+    """
+    set_id = models.UUIDField()
+    object_id = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('set_id', 'object_id')
+
+    @classmethod
+    def stage(cls, pks):
+        """
+        Stage a set of primary keys.
+
+        Args:
+            pks (iterable): Of primary keys.
+
+        Returns:
+            str: The id of the set of staged primary keys.
+        """
+        set_id = uuid.uuid4()
+        cls.objects.bulk_create([cls(set_id=set_id, object_id=pk) for pk in set(pks)],
+                                batch_size=STAGE_BATCH_SIZE)
+        return str(set_id)
+
+    @classmethod
+    def filter(cls, queryset, pks):
+        """
+        Filter a queryset by staged primary keys.
+
+        Args:
+            queryset (django.db.models.QuerySet): The queryset to filter.
+            pks (str or list): The id of a set of staged primary keys, or a list of primary keys.
+
+        Returns:
+            django.db.models.QuerySet: The objects of ``queryset`` with the primary keys.
+        """
+        if isinstance(pks, str):
+            pks = cls.objects.filter(set_id=pks).values('object_id')
+        return queryset.filter(pk__in=pks)
+
+    @classmethod
+    def discard(cls, pks):
+        """
+        Delete a set of staged primary keys.
+
+        Args:
+            pks (str or list): The id of a set of staged primary keys. Lists are ignored.
+        """
+        if isinstance(pks, str):
+            cls.objects.filter(set_id=pks).delete()
+
+    @classmethod
+    def stale(cls):
+        """
+        The staged primary keys which no incomplete task can use.
+
+        Sets are staged right before their task is created, and discarded when it finishes. The
+        sets staged more than STAGE_EXPIRATION before the oldest incomplete task was created
+        belong to tasks which died, or which failed to be enqueued.
+
+        Returns:
+            django.db.models.QuerySet: The stale StagedResources.
+        """
+        cutoff = timezone.now()
+        incomplete = Task.objects.filter(state__in=TASK_INCOMPLETE_STATES)
+        oldest = incomplete.aggregate(oldest=models.Min('_created'))['oldest']
+        if oldest and oldest < cutoff:
+            cutoff = oldest
+        return cls.objects.filter(_created__lt=cutoff - STAGE_EXPIRATION)
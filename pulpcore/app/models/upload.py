@@ -0,0 +1,215 @@
+"""
+Django models related to chunked uploads.
+"""
+from collections import OrderedDict
+import os
+import threading
+
+from django.conf import settings
+from django.db import models, transaction
+
+from pulpcore.app.files import TemporaryDownloadedFile
+from pulpcore.app.hashing import CHUNK_SIZE, ParallelHasher
+from pulpcore.app.models import Model, storage
+from pulpcore.app.models.content import Artifact
+
+# The number of uploads whose in-order chunks are hashed as they arrive, by each process
+HASHED_UPLOADS = 32
+
+# Upload pk -> (ParallelHasher, offset of the first byte not hashed yet), least recent first
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+def _pop_hasher(upload_pk):
+    with _hashers_lock:
+        return _hashers.pop(upload_pk, (None, 0))
+
+
+def _push_hasher(upload_pk, hasher, offset):
+    with _hashers_lock:
+        _hashers[upload_pk] = (hasher, offset)
+        while len(_hashers) > HASHED_UPLOADS:
+            _hashers.popitem(last=False)
+
+
+class Upload(Model):
+    """
+    A file uploaded in chunks, which becomes an Artifact once it's committed.
+
+    The file is allocated with its final size when the Upload is created. Chunks are written at
+    their offset, in any order and concurrently, and each written chunk is recorded so an
+    interrupted upload is resumed by sending the missing ranges only.
+
+    Chunks received in order are hashed as they arrive, by the process receiving them. Committing
+    the Upload hashes whatever wasn't hashed that way.
+
+    Fields:
+
+        file (models.FileField): The file being uploaded, stored outside of Artifact storage.
+        size (models.BigIntegerField): The size of the file in bytes.
+    """
+    file = models.FileField(upload_to=storage.get_upload_path, max_length=255)
+    size = models.BigIntegerField()
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the Upload and allocates its file when the Upload is created.
+
+        Args:
+            args (list): list of positional arguments for Model.save()
+            kwargs (dict): dictionary of keyword arguments to pass to Model.save()
+        """
+        if not self.file:
+            self.file.name = storage.get_upload_path(self, '')
+            os.makedirs(os.path.dirname(self.file.name), exist_ok=True)
+            with open(self.file.name, 'wb') as f:
+                f.truncate(self.size)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the Upload and its file.
+
+        Args:
+            args (list): list of positional arguments for Model.delete()
+            kwargs (dict): dictionary of keyword arguments to pass to Model.delete()
+        """
+        _pop_hasher(self.pk)
+        super().delete(*args, **kwargs)
+        self._remove_file()
+
+    def _remove_file(self):
+        try:
+            os.remove(self.file.name)
+        except FileNotFoundError:
+            pass
+
+    def write_chunk(self, stream, offset, size):
+        """
+        Write a chunk of the file and record it.
+
+        Args:
+            stream (file): A file-like object the chunk is read from.
+            offset (int): The offset of the chunk in the file.
+            size (int): The size of the chunk in bytes.
+
+        Returns:
+            int: The number of bytes written. The chunk is recorded only when it's complete.
+        """
+        hasher, hashed = _pop_hasher(self.pk)
+        if hasher is None and offset == 0:
+            hasher = ParallelHasher(settings.ALLOWED_CONTENT_CHECKSUMS)
+        in_order = hasher is not None and hashed == offset
+
+        written = 0
+        fd = os.open(self.file.name, os.O_WRONLY)
+        try:
+            while written < size:
+                data = stream.read(min(CHUNK_SIZE, size - written))
+                if not data:
+                    break
+                os.pwrite(fd, data, offset + written)
+                if in_order:
+                    hasher.update(data)
+                written += len(data)
+        finally:
+            os.close(fd)
+
+        if in_order and written == size:
+            _push_hasher(self.pk, hasher, offset + size)
+        elif hasher is not None and offset > hashed:
+            # A later chunk doesn't invalidate the bytes hashed so far, a rewritten one does
+            _push_hasher(self.pk, hasher, hashed)
+
+        if written == size:
+            UploadChunk.objects.create(upload=self, offset=offset, size=size)
+        return written
+
+    def missing_ranges(self):
+        """
+        Returns:
+            list: Of (first, last) tuples of the inclusive byte ranges which weren't written yet.
+        """
+        missing = []
+        position = 0
+        for offset, size in self.chunks.order_by('offset').values_list('offset', 'size'):
+            if offset > position:
+                missing.append((position, offset - 1))
+            position = max(position, offset + size)
+        if position < self.size:
+            missing.append((position, self.size - 1))
+        return missing
+
+    def commit(self, expected_digests=None):
+        """
+        Create an Artifact from the uploaded file and delete the Upload.
+
+        The file is linked into Artifact storage, and removed from the upload directory once the
+        transaction is committed. All the chunks must have been written.
+
+        Args:
+            expected_digests (dict): Keyed on the algorithm name provided by hashlib and stores the
+                value of the expected digest.
+
+        Raises:
+            :class:`~pulpcore.exceptions.DigestValidationError`: When any of the ``expected_digest``
+                values don't match the digest of the file
+            :class:`~pulpcore.exceptions.UnsupportedDigestValidationError`: When the file is
+                expected to have a digest which isn't in ALLOWED_CONTENT_CHECKSUMS
+            django.db.IntegrityError: When an Artifact with the same digests already exists.
+
+        Returns:
+            :class:`~pulpcore.app.models.Artifact`: The saved Artifact.
+        """
+        hasher, hashed = _pop_hasher(self.pk)
+        if hasher is None:
+            hasher, hashed = ParallelHasher(settings.ALLOWED_CONTENT_CHECKSUMS), 0
+        with open(self.file.name, 'rb') as f:
+            f.seek(hashed)
+            hasher.update_from_file(f)
+
+        file = TemporaryDownloadedFile(open(self.file.name, 'rb'))
+        file.size = self.size
+        file.hashers = hasher.hashers
+        try:
+            artifact = Artifact.init_and_validate(file, expected_digests=expected_digests,
+                                                  expected_size=self.size)
+        finally:
+            file.close()
+
+        # The file is linked into place and the upload's file is removed once the database is
+        # committed, so a failed commit leaves the Upload as it was
+        path = storage.get_artifact_path(artifact.sha256)
+        placed = storage.link_file(self.file.name, path)
+        artifact.file = path
+        try:
+            with transaction.atomic():
+                artifact.save()
+                _pop_hasher(self.pk)
+                super().delete()
+                transaction.on_commit(self._remove_file)
+        except Exception:
+            # The file is kept when it belongs to an Artifact committed meanwhile
+            if placed and not Artifact.objects.filter(sha256=artifact.sha256).exists():
+                os.remove(path)
+            raise
+        return artifact
+
+
+class UploadChunk(Model):
+    """
+    A chunk of an Upload which was written.
+
+    Fields:
+
+        offset (models.BigIntegerField): The offset of the chunk in the file.
+        size (models.BigIntegerField): The size of the chunk in bytes.
+
+    Relations:
+
+        upload (models.ForeignKey): The Upload the chunk belongs to.
+    """
+    upload = models.ForeignKey(Upload, on_delete=models.CASCADE, related_name='chunks')
+    offset = models.BigIntegerField()
+    size = models.BigIntegerField()
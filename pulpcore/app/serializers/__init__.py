@@ -21,10 +21,15 @@ from .fields import (  # noqa
     relative_path_validator,
 )
 from .content import (  # noqa
+    ArtifactImportSerializer,
+    ArtifactLookupSerializer,
     ArtifactSerializer,
+    ArtifactVerifySerializer,
     NoArtifactContentSerializer,
     SingleArtifactContentSerializer,
     MultipleArtifactContentSerializer,
+    UploadCommitSerializer,
+    UploadSerializer,
 )
 from .progress import ProgressReportSerializer  # noqa
 from .publication import (  # noqa
@@ -40,6 +45,7 @@ from .repository import (  # noqa
     RepositorySerializer,
     RepositorySyncURLSerializer,
     RepositoryVersionSerializer,
-    RepositoryVersionCreateSerializer
+    RepositoryVersionCreateSerializer,
+    RepositoryVersionMembershipSerializer
 )
 from .task import MinimalTaskSerializer, TaskSerializer, WorkerSerializer  # noqa
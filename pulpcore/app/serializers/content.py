@@ -1,6 +1,7 @@
 from gettext import gettext as _
-import hashlib
+import os
 
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
@@ -162,25 +163,218 @@ class ArtifactSerializer(base.ModelSerializer):
         else:
             data['size'] = data['file'].size
 
-        for algorithm in hashlib.algorithms_guaranteed:
-            if algorithm in models.Artifact.DIGEST_FIELDS:
-                digest = data['file'].hashers[algorithm].hexdigest()
-
-                if algorithm in data and digest != data[algorithm]:
-                    raise serializers.ValidationError(_("The %s checksum did not match.")
+        allowed = models.Artifact.allowed_digest_fields()
+        for algorithm in models.Artifact.DIGEST_FIELDS:
+            if algorithm not in allowed:
+                if data.get(algorithm):
+                    raise serializers.ValidationError(_("The %s checksum is not allowed.")
                                                       % algorithm)
-                else:
-                    data[algorithm] = digest
-                if algorithm in UNIQUE_ALGORITHMS:
-                    validator = UniqueValidator(models.Artifact.objects.all(),
-                                                message=_("{0} checksum must be "
-                                                          "unique.").format(algorithm))
-                    validator.field_name = algorithm
-                    validator.instance = None
-                    validator(digest)
+                continue
+            digest = data['file'].hashers[algorithm].hexdigest()
+
+            if algorithm in data and digest != data[algorithm]:
+                raise serializers.ValidationError(_("The %s checksum did not match.")
+                                                  % algorithm)
+            else:
+                data[algorithm] = digest
+            if algorithm in UNIQUE_ALGORITHMS:
+                validator = UniqueValidator(models.Artifact.objects.all(),
+                                            message=_("{0} checksum must be "
+                                                      "unique.").format(algorithm))
+                validator.field_name = algorithm
+                validator.instance = None
+                validator(digest)
         return data
 
     class Meta:
         model = models.Artifact
         fields = base.ModelSerializer.Meta.fields + ('file', 'size', 'md5', 'sha1', 'sha224',
                                                      'sha256', 'sha384', 'sha512')
+
+
+class ArtifactLookupSerializer(serializers.Serializer):
+    md5 = serializers.ListField(
+        help_text=_("MD5 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    sha1 = serializers.ListField(
+        help_text=_("SHA-1 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    sha224 = serializers.ListField(
+        help_text=_("SHA-224 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    sha256 = serializers.ListField(
+        help_text=_("SHA-256 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    sha384 = serializers.ListField(
+        help_text=_("SHA-384 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    sha512 = serializers.ListField(
+        help_text=_("SHA-512 checksums of the Artifacts to look up."),
+        child=serializers.CharField(),
+        required=False
+    )
+
+    def validate(self, data):
+        """
+        Validate that the checksums are of allowed algorithms.
+
+        Args:
+            data (dict): Lists of checksums keyed on the algorithm name.
+
+        Raises:
+            :class:`rest_framework.exceptions.ValidationError`: When a checksum isn't in the
+                ALLOWED_CONTENT_CHECKSUMS setting.
+        """
+        allowed = models.Artifact.allowed_digest_fields()
+        for algorithm in data:
+            if algorithm not in allowed:
+                raise serializers.ValidationError(_("The %s checksum is not allowed.")
+                                                  % algorithm)
+        return data
+
+
+class ArtifactImportSerializer(serializers.Serializer):
+    path = serializers.CharField(
+        help_text=_("The absolute path of a directory on the server whose files are imported as "
+                    "Artifacts. It must be within one of the ALLOWED_IMPORT_PATHS.")
+    )
+
+    def validate_path(self, value):
+        """
+        Validate that the path is a directory within the ALLOWED_IMPORT_PATHS setting.
+
+        Args:
+            value (str): The path of the directory.
+
+        Returns:
+            str: The path, with its symbolic links resolved.
+
+        Raises:
+            :class:`rest_framework.exceptions.ValidationError`: When the path isn't allowed or
+                isn't a directory.
+        """
+        if not os.path.isabs(value):
+            raise serializers.ValidationError(_("The path must be absolute."))
+        path = os.path.realpath(value)
+        for allowed in settings.ALLOWED_IMPORT_PATHS:
+            allowed = os.path.realpath(allowed)
+            if os.path.commonpath([path, allowed]) == allowed:
+                break
+        else:
+            raise serializers.ValidationError(_("The path is not within the allowed import "
+                                                "paths."))
+        if not os.path.isdir(path):
+            raise serializers.ValidationError(_("The path is not a directory."))
+        return path
+
+
+class ArtifactVerifySerializer(serializers.Serializer):
+    max_age = serializers.IntegerField(
+        help_text=_("Only verify the Artifacts which weren't verified within this number of "
+                    "days. All Artifacts are verified if it's not specified."),
+        min_value=0,
+        required=False,
+        allow_null=True
+    )
+
+    repair = serializers.BooleanField(
+        help_text=_("Whether to download the missing or corrupt files again from the remotes "
+                    "of their content."),
+        default=True
+    )
+
+    max_bandwidth = serializers.IntegerField(
+        help_text=_("The maximum number of bytes read per second while verifying. Reads are "
+                    "not limited if it's not specified."),
+        min_value=1,
+        required=False,
+        allow_null=True
+    )
+
+
+class UploadSerializer(base.ModelSerializer):
+    _href = base.IdentityField(
+        view_name='uploads-detail',
+    )
+
+    size = serializers.IntegerField(
+        help_text=_("The size of the file in bytes."),
+        min_value=1
+    )
+
+    missing_ranges = serializers.SerializerMethodField(
+        help_text=_("The inclusive byte ranges of the file which weren't uploaded yet, "
+                    "e.g. [[0, 1048575]]."),
+    )
+
+    def get_missing_ranges(self, obj):
+        return obj.missing_ranges()
+
+    class Meta:
+        model = models.Upload
+        fields = base.ModelSerializer.Meta.fields + ('size', 'missing_ranges')
+
+
+class UploadCommitSerializer(serializers.Serializer):
+    md5 = serializers.CharField(
+        help_text=_("The expected MD5 checksum of the file."),
+        required=False
+    )
+
+    sha1 = serializers.CharField(
+        help_text=_("The expected SHA-1 checksum of the file."),
+        required=False
+    )
+
+    sha224 = serializers.CharField(
+        help_text=_("The expected SHA-224 checksum of the file."),
+        required=False
+    )
+
+    sha256 = serializers.CharField(
+        help_text=_("The expected SHA-256 checksum of the file."),
+        required=False
+    )
+
+    sha384 = serializers.CharField(
+        help_text=_("The expected SHA-384 checksum of the file."),
+        required=False
+    )
+
+    sha512 = serializers.CharField(
+        help_text=_("The expected SHA-512 checksum of the file."),
+        required=False
+    )
+
+    def validate(self, data):
+        """
+        Reject the checksums which aren't allowed.
+
+        Args:
+            data (dict): The expected digests keyed on the algorithm name.
+
+        Raises:
+            :class:`rest_framework.exceptions.ValidationError`: When a checksum isn't in the
+                ALLOWED_CONTENT_CHECKSUMS setting.
+        """
+        allowed = models.Artifact.allowed_digest_fields()
+        for algorithm in data:
+            if algorithm not in allowed:
+                raise serializers.ValidationError(_("The %s checksum is not allowed.")
+                                                  % algorithm)
+        return data
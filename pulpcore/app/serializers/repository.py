@@ -40,11 +40,19 @@ class RepositorySerializer(ModelSerializer):
         required=False,
         allow_blank=True
     )
+    retained_versions = serializers.IntegerField(
+        help_text=_('The number of most recent versions to keep. Older versions are squashed '
+                    'when a new version is created, unless they are published. All versions are '
+                    'kept when unset.'),
+        required=False,
+        allow_null=True,
+        min_value=1
+    )
 
     class Meta:
         model = models.Repository
         fields = ModelSerializer.Meta.fields + ('_versions_href', '_latest_version_href', 'name',
-                                                'description')
+                                                'description', 'retained_versions')
 
 
 class RemoteSerializer(MasterModelSerializer):
@@ -296,6 +304,8 @@ class RepositoryVersionSerializer(ModelSerializer, NestedHyperlinkedModelSeriali
         Returns:
             dict: of {<_type>: <count>}
         """
+        if obj.content_summary is not None:
+            return obj.content_summary
         annotated = obj.content.values('_type').annotate(count=Count('_type'))
         return {c['_type']: c['count'] for c in annotated}
 
@@ -306,6 +316,8 @@ class RepositoryVersionSerializer(ModelSerializer, NestedHyperlinkedModelSeriali
         Returns:
             dict: of {<_type>: <count>}
         """
+        if obj.content_added_summary is not None:
+            return obj.content_added_summary
         annotated = obj.added().values('_type').annotate(count=Count('_type'))
         return {c['_type']: c['count'] for c in annotated}
 
@@ -316,6 +328,8 @@ class RepositoryVersionSerializer(ModelSerializer, NestedHyperlinkedModelSeriali
         Returns:
             dict: of {<_type>: <count>}
         """
+        if obj.content_removed_summary is not None:
+            return obj.content_removed_summary
         annotated = obj.removed().values('_type').annotate(count=Count('_type'))
         return {c['_type']: c['count'] for c in annotated}
 
@@ -449,3 +463,35 @@ class RepositoryVersionCreateSerializer(ModelSerializer, NestedHyperlinkedModelS
     class Meta:
         model = models.RepositoryVersion
         fields = ['add_content_units', 'remove_content_units', 'base_version']
+
+
+class RepositoryVersionMembershipSerializer(serializers.Serializer):
+    content_hrefs = serializers.ListField(
+        help_text=_('A list of content units referenced by HREF to look for in the repository '
+                    'version'),
+        child=serializers.CharField(),
+        required=False,
+        default=list,
+    )
+    artifacts = serializers.ListField(
+        help_text=_('A list of content units to look for in the repository version, each '
+                    'identified by one artifact digest, e.g. {"sha256": "<digest>"}, and '
+                    'optionally by the "relative_path" of the artifact in the content unit'),
+        child=serializers.DictField(child=serializers.CharField()),
+        required=False,
+        default=list,
+    )
+
+    def validate_artifacts(self, value):
+        """
+        Validate that each artifact is identified by exactly one digest in
+        ALLOWED_CONTENT_CHECKSUMS.
+        """
+        allowed = models.Artifact.allowed_digest_fields()
+        for artifact in value:
+            digests = set(artifact) - {'relative_path'}
+            if len(digests) != 1 or not digests <= set(allowed):
+                raise serializers.ValidationError(
+                    _('Each artifact must be identified by exactly one of: {digests}').format(
+                        digests=', '.join(allowed)))
+        return value
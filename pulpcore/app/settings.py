@@ -212,3 +212,15 @@ CONTENT_HOST = None
 CONTENT_PATH_PREFIX = '/pulp/content/'
 
 PROFILE_STAGES_API = False
+
+# The checksums computed and stored for every Artifact. sha256 is always required.
+ALLOWED_CONTENT_CHECKSUMS = ['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512']
+
+# The directories Artifacts can be imported from, with their subdirectories
+ALLOWED_IMPORT_PATHS = []
+
+# The minutes unreferenced Content and Artifacts are kept by orphan cleanup since their last update
+ORPHAN_PROTECTION_TIME = 0
+
+# The minutes uploads are kept by orphan cleanup since a chunk was last written to them
+UPLOAD_EXPIRATION_TIME = 1440
@@ -0,0 +1,256 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from gettext import gettext as _
+import hashlib
+from logging import getLogger
+import os
+import time
+
+from django.db.models import Q
+from django.utils import timezone
+
+from pulpcore.app import models
+from pulpcore.app.hashing import CHUNK_SIZE, ParallelHasher
+from pulpcore.app.models import storage
+from pulpcore.exceptions import ArtifactIntegrityError, exception_to_dict
+
+log = getLogger(__name__)
+
+# The number of hashed files whose Artifacts are created together
+IMPORT_BATCH_SIZE = 1000
+
+# The number of files each hashing process is handed at once
+IMPORT_HASH_CHUNK_SIZE = 16
+
+# The number of Artifacts verified together, whose verification time is saved by one query
+VERIFY_BATCH_SIZE = 1000
+
+
+def import_directory(path):
+    """
+    Create Artifacts from the files of a directory tree on the server.
+
+    The files are hashed by a pool of processes. Their Artifacts are created in batches, skipping
+    the files of existing Artifacts, and the files are hardlinked or cloned into Artifact storage,
+    so the directory tree is left untouched. Symbolic links are not followed.
+
+    Args:
+        path (str): The absolute path of the directory tree, within ALLOWED_IMPORT_PATHS.
+    """
+    paths = list(_walk(path))
+    algorithms = models.Artifact.allowed_digest_fields()
+    created = 0
+
+    log.info(_('Importing %(n)d files from %(path)s'), {'n': len(paths), 'path': path})
+
+    with models.ProgressBar(message=_('Import Artifacts'), total=len(paths)) as pb:
+        with ProcessPoolExecutor() as executor:
+            hashed = executor.map(_hash_file, paths, [algorithms] * len(paths),
+                                  chunksize=IMPORT_HASH_CHUNK_SIZE)
+            batch = []
+            for result in hashed:
+                batch.append(result)
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    created += _create_artifacts(batch)
+                    pb.done += len(batch)
+                    pb.save()
+                    batch = []
+            if batch:
+                created += _create_artifacts(batch)
+                pb.done += len(batch)
+                pb.save()
+
+    log.info(_('Created %(created)d Artifacts, %(existing)d files were already present'),
+             {'created': created, 'existing': len(paths) - created})
+
+
+def _walk(path):
+    """
+    Yields:
+        str: The path of each regular file in the directory tree, in a stable order.
+    """
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            if os.path.isfile(file_path) and not os.path.islink(file_path):
+                yield file_path
+
+
+def _hash_file(path, algorithms):
+    """
+    Hash a file, in a process of the pool.
+
+    Args:
+        path (str): The path of the file.
+        algorithms (tuple): The names of the algorithms to compute.
+
+    Returns:
+        tuple: The path, the size and the digests of the file keyed on the algorithm name.
+    """
+    hasher = ParallelHasher(algorithms)
+    with open(path, 'rb') as f:
+        size = hasher.update_from_file(f)
+    return path, size, hasher.hexdigests()
+
+
+def _create_artifacts(files):
+    """
+    Place the files which aren't Artifacts yet into Artifact storage and create their Artifacts.
+
+    Args:
+        files (list): Of (path, size, digests) tuples.
+
+    Returns:
+        int: The number of Artifacts created.
+    """
+    by_sha256 = {}
+    for path, size, digests in files:
+        by_sha256.setdefault(digests['sha256'], (path, size, digests))
+    existing = set(models.Artifact.objects.filter(sha256__in=by_sha256.keys())
+                   .values_list('sha256', flat=True))
+
+    artifacts = []
+    for sha256, (path, size, digests) in by_sha256.items():
+        if sha256 in existing:
+            continue
+        destination = storage.get_artifact_path(sha256)
+        storage.link_file(path, destination)
+        artifacts.append(models.Artifact(file=destination, size=size, **digests))
+    models.Artifact.objects.bulk_get_or_create(artifacts, batch_size=IMPORT_BATCH_SIZE)
+    return len(artifacts)
+
+
+def verify(max_age=None, repair=True, max_bandwidth=None):
+    """
+    Verify the files of Artifacts against their sha256 digest, and repair the broken ones.
+
+    The files are hashed by a pool of processes. The files which are missing or corrupt are
+    downloaded again from the RemoteArtifacts of their content when ``repair`` is set, and they
+    are reported as non-fatal errors of the task otherwise or when that fails.
+
+    Args:
+        max_age (int): Only verify the Artifacts which weren't verified within this number of
+            days. All the Artifacts are verified when it's None.
+        repair (bool): Whether to download the broken files again.
+        max_bandwidth (int): The maximum number of bytes read per second by all the processes.
+            Reads aren't limited when it's None.
+    """
+    artifacts = models.Artifact.objects.order_by('pk')
+    if max_age is not None:
+        cutoff = timezone.now() - timedelta(days=max_age)
+        artifacts = artifacts.filter(Q(verified__isnull=True) | Q(verified__lt=cutoff))
+    file_storage = models.Artifact._meta.get_field('file').storage
+    task = models.Task.current()
+
+    processes = os.cpu_count() or 1
+    rate = max(max_bandwidth // processes, 1) if max_bandwidth else None
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        with models.ProgressBar(message=_('Verify Artifacts'), total=artifacts.count()) as pb:
+            with models.ProgressBar(message=_('Repair Artifacts')) as repaired_pb:
+                last_pk = 0
+                while True:
+                    batch = list(artifacts.filter(pk__gt=last_pk)
+                                 .values_list('pk', 'file', 'sha256')[:VERIFY_BATCH_SIZE])
+                    if not batch:
+                        break
+                    last_pk = batch[-1][0]
+                    paths = [file_storage.path(name) for pk, name, sha256 in batch]
+                    results = executor.map(_verify_file, paths,
+                                           [sha256 for pk, name, sha256 in batch],
+                                           [rate] * len(batch),
+                                           chunksize=IMPORT_HASH_CHUNK_SIZE)
+
+                    verified = []
+                    for pk, path, missing in zip([row[0] for row in batch], paths, results):
+                        if missing is None:
+                            verified.append(pk)
+                            continue
+                        artifact = models.Artifact.objects.filter(pk=pk).first()
+                        if artifact is None:
+                            # The Artifact and its file were deleted meanwhile by orphan cleanup
+                            continue
+                        error = ArtifactIntegrityError(pk, path, missing)
+                        log.warning(str(error))
+                        if repair and _repair(artifact, path):
+                            verified.append(pk)
+                            repaired_pb.increment()
+                        elif task:
+                            task.non_fatal_errors.append(exception_to_dict(error))
+                            task.save()
+
+                    models.Artifact.objects.filter(pk__in=verified).update(
+                        verified=timezone.now())
+                    pb.done += len(batch)
+                    pb.save()
+
+
+def _verify_file(path, sha256, rate=None):
+    """
+    Hash a file with sha256, in a process of the pool.
+
+    Args:
+        path (str): The path of the file.
+        sha256 (str): The expected sha256 digest.
+        rate (int): The maximum number of bytes read per second, or None.
+
+    Returns:
+        bool or None: None when the file matches the digest, otherwise whether the file is
+            missing rather than corrupt.
+    """
+    hasher = hashlib.sha256()
+    start = time.monotonic()
+    read = 0
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                read += len(chunk)
+                if rate:
+                    ahead = read / rate - (time.monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+    except FileNotFoundError:
+        return True
+    if hasher.hexdigest() != sha256:
+        return False
+    return None
+
+
+def _repair(artifact, path):
+    """
+    Download the file of an Artifact again from the RemoteArtifacts of its content.
+
+    Args:
+        artifact (pulpcore.app.models.Artifact): The Artifact whose file is broken.
+        path (str): The path of its file.
+
+    Returns:
+        bool: Whether the file was replaced.
+    """
+    remote_artifacts = models.RemoteArtifact.objects.filter(
+        content_artifact__artifact=artifact).select_related('remote')
+    for remote_artifact in remote_artifacts:
+        downloader = remote_artifact.remote.cast().get_downloader(remote_artifact=remote_artifact)
+        try:
+            download_result = asyncio.get_event_loop().run_until_complete(downloader.run())
+        except Exception as exc:
+            log.warning(_('Downloading %(url)s failed: %(error)s'),
+                        {'url': remote_artifact.url, 'error': exc})
+            continue
+        if download_result.artifact_attributes.get('sha256') != artifact.sha256:
+            log.warning(_('The file downloaded from %s has a different sha256 checksum.'),
+                        remote_artifact.url)
+            os.remove(download_result.path)
+            continue
+        # The corrupt file is replaced atomically, it's served until then
+        storage.move_file(download_result.path, path, replace=True)
+        log.info(_('Repaired the file %(path)s of Artifact %(pk)d from %(url)s'),
+                 {'path': path, 'pk': artifact.pk, 'url': remote_artifact.url})
+        return True
+    return False
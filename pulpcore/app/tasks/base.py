@@ -1,5 +1,10 @@
+from django.db import connection, transaction
+
 from pulpcore.app.apps import get_plugin_config
 
+# The maximum number of rows deleted by each statement of batched_delete()
+DELETE_BATCH_SIZE = 10000
+
 
 def general_update(instance_id, app_label, serializer_name, *args, **kwargs):
     """
@@ -46,3 +51,48 @@ def general_delete(instance_id, app_label, serializer_name):
     serializer_class = get_plugin_config(app_label).named_serializers[serializer_name]
     instance = serializer_class.Meta.model.objects.get(pk=instance_id).cast()
     instance.delete()
+
+
+def batched_delete(queryset, progress_bar=None, returning=None, callback=None):
+    """
+    Delete the rows of a queryset with raw DELETE statements of at most DELETE_BATCH_SIZE rows.
+
+    Each batch is committed on its own, so neither the worker memory nor the time locks are held
+    grows with the number of rows, and an interrupted delete is resumed by running it again.
+    Cascades and signals are not handled, rows referencing the deleted rows must be deleted first.
+
+    Args:
+        queryset (django.db.models.QuerySet): The rows to delete.
+        progress_bar (pulpcore.app.models.ProgressBar): An optional progress bar which is
+            incremented by the number of rows deleted.
+        returning (str): The optional name of a field whose values in the deleted rows are passed
+            to ``callback``.
+        callback (callable): Called with the list of the ``returning`` values of each batch once
+            the batch is committed.
+    """
+    model = queryset.model
+    quote_name = connection.ops.quote_name
+    select, params = queryset.order_by().values('pk')[:DELETE_BATCH_SIZE].query.sql_with_params()
+    sql = 'DELETE FROM {table} WHERE {pk} IN (SELECT {pk} FROM ({select}) batch)'.format(
+        table=quote_name(model._meta.db_table),
+        pk=quote_name(model._meta.pk.column),
+        select=select,
+    )
+    if returning:
+        sql += ' RETURNING {column}'.format(
+            column=quote_name(model._meta.get_field(returning).column))
+    while True:
+        values = None
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                deleted = cursor.rowcount
+                if returning:
+                    values = [row[0] for row in cursor.fetchall()]
+        if values:
+            callback(values)
+        if progress_bar and deleted:
+            progress_bar.done += deleted
+            progress_bar.save()
+        if deleted < DELETE_BATCH_SIZE:
+            break
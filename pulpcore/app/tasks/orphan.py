@@ -1,32 +1,158 @@
-from pulpcore.app.models import Artifact, Content, ContentArtifact, ProgressBar, RepositoryContent
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from gettext import gettext as _
+from logging import getLogger
+import os
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Min
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from pulpcore.app.models import (
+    Artifact,
+    Content,
+    ContentArtifact,
+    ProgressBar,
+    RepositoryContent,
+    StagedResource,
+    Task,
+    Upload,
+)
+from pulpcore.app.tasks.base import batched_delete, DELETE_BATCH_SIZE
+from pulpcore.constants import TASK_STATES
+
+log = getLogger(__name__)
+
+# The number of threads removing the files of orphan Artifacts
+UNLINK_THREADS = 8
+
+
+def orphan_protection_cutoff():
+    """
+    Determine the time before which unreferenced Content and Artifacts were last updated to be
+    orphans.
+
+    It is ORPHAN_PROTECTION_TIME minutes ago, or the start of the oldest running task if that's
+    earlier, so what in-flight tasks create, or fetch again with ``bulk_get_or_create()`` which
+    touches the rows, is protected until they add it to a repository.
+
+    Returns:
+        datetime.datetime: The cutoff time.
+    """
+    cutoff = timezone.now() - timedelta(minutes=settings.ORPHAN_PROTECTION_TIME)
+    running = Task.objects.filter(state=TASK_STATES.RUNNING)
+    current = Task.current()
+    if current:
+        running = running.exclude(pk=current.pk)
+    oldest = running.aggregate(oldest=Min('started_at'))['oldest']
+    if oldest and oldest < cutoff:
+        cutoff = oldest
+    return cutoff
 
 
 def orphan_cleanup():
     """
     Delete all orphan Content and Artifact records.
-    This task removes Artifact files from the filesystem as well.
+    This task removes Artifact files from the filesystem as well, and the stale
+    :class:`~pulpcore.app.models.StagedResource` sets and the expired uploads.
+
+    Content and Artifacts are orphans when they aren't referenced, and weren't updated since the
+    :func:`orphan_protection_cutoff`. Content staged to be added to a repository version is
+    referenced too. Repositories keep changing while the cleanup runs, so the references are
+    checked again by each batch deleted, and a batch which became referenced meanwhile is skipped
+    and cleaned up by the next run.
     """
+    cutoff = orphan_protection_cutoff()
+    log.info(_('Cleaning up the orphans last updated before %s'), cutoff)
+
     # Content cleanup
-    content = Content.objects.exclude(pk__in=RepositoryContent.objects.values_list('content_id',
-                                                                                   flat=True))
-    progress_bar = ProgressBar(message='Clean up orphan Content', total=content.count(),
-                               done=0, state='running')
-    progress_bar.save()
-    content.delete()
-    progress_bar.done = progress_bar.total
-    progress_bar.state = 'completed'
-    progress_bar.save()
+    content = Content.objects.filter(_last_updated__lt=cutoff).exclude(
+        pk__in=RepositoryContent.objects.values('content_id')).exclude(
+        pk__in=StagedResource.objects.values('object_id'))
+    with ProgressBar(message=_('Clean up orphan Content'), total=content.count()) as pb:
+        skipped = set()
+        while True:
+            batch = list(content.exclude(pk__in=skipped).values_list('pk', flat=True)
+                         [:DELETE_BATCH_SIZE])
+            if not batch:
+                break
+            try:
+                with transaction.atomic():
+                    content.filter(pk__in=batch).delete()
+            except IntegrityError:
+                # Some of the batch was added to a repository meanwhile, the others are
+                # cleaned up by the next run
+                log.info(_('Skipped %d orphan Content referenced meanwhile'), len(batch))
+                skipped.update(batch)
+                continue
+            pb.done += len(batch)
+            pb.save()
 
     # Artifact cleanup
-    artifacts = Artifact.objects.exclude(pk__in=ContentArtifact.objects.values_list('artifact_id',
-                                                                                    flat=True))
-    progress_bar = ProgressBar(message='Clean up orphan Artifacts', total=artifacts.count(),
-                               done=0, state='running')
-    progress_bar.save()
-    for artifact in artifacts:
-        # we need to manually call delete() because it cleans up the file on the filesystem
-        artifact.delete()
-        progress_bar.increment()
-
-    progress_bar.state = 'completed'
-    progress_bar.save()
+    referenced = ContentArtifact.objects.filter(artifact__isnull=False).values('artifact_id')
+    artifacts = Artifact.objects.filter(_last_updated__lt=cutoff).exclude(pk__in=referenced)
+    storage = Artifact._meta.get_field('file').storage
+    with ProgressBar(message=_('Clean up orphan Artifacts'), total=artifacts.count()) as pb:
+        with ThreadPoolExecutor(max_workers=UNLINK_THREADS) as executor:
+
+            def remove_files(names):
+                # The rows are deleted first, a missing row with a remaining file is harmless
+                list(executor.map(storage.delete, names))
+
+            skipped = set()
+            while True:
+                batch = list(artifacts.exclude(pk__in=skipped).values_list('pk', flat=True)
+                             [:DELETE_BATCH_SIZE])
+                if not batch:
+                    break
+                try:
+                    batched_delete(artifacts.filter(pk__in=batch), progress_bar=pb,
+                                   returning='file', callback=remove_files)
+                except IntegrityError:
+                    # Some of the batch was referenced meanwhile, the others are cleaned up by
+                    # the next run
+                    log.info(_('Skipped %d orphan Artifacts referenced meanwhile'), len(batch))
+                    skipped.update(batch)
+
+    # Staged primary keys cleanup
+    stale = StagedResource.stale()
+    with ProgressBar(message=_('Clean up stale staged resources'), total=stale.count()) as pb:
+        batched_delete(stale, progress_bar=pb)
+
+    # Upload cleanup
+    cutoff = timezone.now() - timedelta(minutes=settings.UPLOAD_EXPIRATION_TIME)
+    uploads = Upload.objects.annotate(
+        last_written=Coalesce(Max('chunks___created'), '_created')).filter(last_written__lt=cutoff)
+    with ProgressBar(message=_('Clean up expired uploads'), total=uploads.count()) as pb:
+        for upload in uploads.iterator():
+            upload.delete()
+            pb.increment()
+    _remove_unknown_upload_files(cutoff)
+
+
+def _remove_unknown_upload_files(cutoff):
+    """
+    Remove the files under MEDIA_ROOT/upload which belong to no Upload.
+
+    Such files are left when creating an Upload fails after its file was allocated. The files
+    modified since the cutoff are kept, they may belong to an Upload being created.
+
+    Args:
+        cutoff (datetime.datetime): The time the files were last modified before to be removed.
+    """
+    try:
+        entries = list(os.scandir(os.path.join(settings.MEDIA_ROOT, 'upload')))
+    except FileNotFoundError:
+        return
+    known = set(Upload.objects.values_list('file', flat=True))
+    for entry in entries:
+        if entry.path in known or not entry.is_file():
+            continue
+        if entry.stat().st_mtime < cutoff.timestamp():
+            log.info(_('Removing the file %s, which belongs to no upload'), entry.path)
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
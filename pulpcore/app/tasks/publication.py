@@ -0,0 +1,58 @@
+from gettext import gettext as _
+from logging import getLogger
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from pulpcore.app import models
+from pulpcore.app.tasks.base import batched_delete
+
+log = getLogger(__name__)
+
+
+def delete(publication_pk):
+    """
+    Delete a :class:`~pulpcore.app.models.Publication`
+
+    The published files are deleted in batches first, so an interrupted delete is resumed by
+    deleting the publication again.
+
+    Args:
+        publication_pk (int): The primary key of the publication to be deleted
+    """
+    publications = models.Publication.objects.filter(pk=publication_pk)
+    if not publications.exists():
+        log.info(_('The publication was not found. Nothing to do.'))
+        return
+
+    with models.ProgressBar(message=_('Delete Published Files')) as pb:
+        delete_published_files(publications, progress_bar=pb)
+    delete_publications(publications)
+
+
+def delete_published_files(publications, progress_bar=None):
+    """
+    Delete the published files of publications in batches.
+
+    Args:
+        publications (django.db.models.QuerySet): The publications whose files are deleted.
+        progress_bar (pulpcore.app.models.ProgressBar): An optional progress bar which is
+            incremented by the number of files deleted.
+    """
+    for model in (models.PublishedArtifact, models.PublishedMetadata):
+        batched_delete(model.objects.filter(publication__in=publications),
+                       progress_bar=progress_bar)
+
+
+def delete_publications(publications):
+    """
+    Delete publications whose published files were deleted, and their CreatedResources.
+
+    Args:
+        publications (django.db.models.QuerySet): The publications to delete.
+    """
+    content_type = ContentType.objects.get_for_model(models.Publication)
+    with transaction.atomic():
+        models.CreatedResource.objects.filter(
+            content_type=content_type, object_id__in=publications.values('pk')).delete()
+        publications.delete()
@@ -1,10 +1,13 @@
 from gettext import gettext as _
 from logging import getLogger
 
+from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
 from pulpcore.app import models
 from pulpcore.app import serializers
+from pulpcore.app.tasks import publication
+from pulpcore.app.tasks.base import batched_delete, DELETE_BATCH_SIZE
 
 log = getLogger(__name__)
 
@@ -13,9 +16,40 @@ def delete(repo_id):
     """
     Delete a :class:`~pulpcore.app.models.Repository`
 
+    The published files, content memberships and versions of the repository are deleted in
+    batches first, so an interrupted delete is resumed by deleting the repository again.
+
     Args:
         repo_id (int): The name of the repository to be deleted
     """
+    if not models.Repository.objects.filter(pk=repo_id).exists():
+        log.info(_('The repository was not found. Nothing to do.'))
+        return
+
+    publications = models.Publication.objects.filter(repository_version__repository_id=repo_id)
+    with models.ProgressBar(message=_('Delete Published Files')) as pb:
+        publication.delete_published_files(publications, progress_bar=pb)
+    publication.delete_publications(publications)
+
+    relations = models.RepositoryContent.objects.filter(repository_id=repo_id)
+    with models.ProgressBar(message=_('Delete Repository Content'),
+                            total=relations.count()) as pb:
+        batched_delete(relations, progress_bar=pb)
+
+    versions = models.RepositoryVersion.objects.filter(repository_id=repo_id)
+    content_type = ContentType.objects.get_for_model(models.RepositoryVersion)
+    with models.ProgressBar(message=_('Delete Repository Versions'),
+                            total=versions.count()) as pb:
+        while True:
+            batch = list(versions.values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+            if not batch:
+                break
+            with transaction.atomic():
+                models.CreatedResource.objects.filter(content_type=content_type,
+                                                      object_id__in=batch).delete()
+                models.RepositoryVersion.objects.filter(pk__in=batch).delete()
+            pb.done += len(batch)
+            pb.save()
 
     models.Repository.objects.filter(pk=repo_id).delete()
 
@@ -67,6 +101,26 @@ def delete_version(pk):
         version.delete()
 
 
+def clone(repository_version_pk, name, description=''):
+    """
+    Create a new repository whose first version has the content of an existing version.
+
+    Args:
+        repository_version_pk (int): The primary key for the RepositoryVersion to copy.
+        name (str): The name of the new repository.
+        description (str): An optional description of the new repository.
+    """
+    source = models.RepositoryVersion.objects.get(pk=repository_version_pk)
+
+    log.info(_('Cloning version %(v)d of repository %(r)s into repository %(n)s'),
+             {'v': source.number, 'r': source.repository.name, 'n': name})
+
+    with transaction.atomic():
+        repository = models.Repository.objects.create(name=name, description=description)
+        models.CreatedResource(content_object=repository).save()
+        models.RepositoryVersion.clone(repository, source)
+
+
 def add_and_remove(repository_pk, add_content_units, remove_content_units, base_version_pk=None):
     """
     Create a new repository version by adding and then removing content units.
@@ -74,20 +128,34 @@ def add_and_remove(repository_pk, add_content_units, remove_content_units, base_
     Args:
         repository_pk (int): The primary key for a Repository for which a new Repository Version
             should be created.
-        add_content_units (list): List of PKs for :class:`~pulpcore.app.models.Content` that
-            should be added to the previous Repository Version for this Repository.
-        remove_content_units (list): List of PKs for:class:`~pulpcore.app.models.Content` that
-            should be removed from the previous Repository Version for this Repository.
+        add_content_units (str or list): The id of a set of
+            :class:`~pulpcore.app.models.StagedResource` or a list of PKs for
+            :class:`~pulpcore.app.models.Content` that should be added to the previous Repository
+            Version for this Repository.
+        remove_content_units (str or list): The id of a set of
+            :class:`~pulpcore.app.models.StagedResource` or a list of PKs for
+            :class:`~pulpcore.app.models.Content` that should be removed from the previous
+            Repository Version for this Repository.
         base_version_pk (int): the primary key for a RepositoryVersion whose content will be used
             as the initial set of content for our new RepositoryVersion
     """
-    repository = models.Repository.objects.get(pk=repository_pk)
-
-    if base_version_pk:
-        base_version = models.RepositoryVersion.objects.get(pk=base_version_pk)
-    else:
-        base_version = None
-
-    with models.RepositoryVersion.create(repository, base_version=base_version) as new_version:
-        new_version.add_content(models.Content.objects.filter(pk__in=add_content_units))
-        new_version.remove_content(models.Content.objects.filter(pk__in=remove_content_units))
+    try:
+        repository = models.Repository.objects.get(pk=repository_pk)
+
+        if base_version_pk:
+            base_version = models.RepositoryVersion.objects.get(pk=base_version_pk)
+        else:
+            base_version = None
+
+        to_add = models.StagedResource.filter(models.Content.objects.all(), add_content_units)
+        to_remove = models.StagedResource.filter(models.Content.objects.all(),
+                                                 remove_content_units)
+
+        with models.RepositoryVersion.create(repository, base_version=base_version) as new_version:
+            with models.ProgressBar(message=_('Add Content')) as pb:
+                new_version.add_content(to_add, progress_bar=pb)
+            with models.ProgressBar(message=_('Remove Content')) as pb:
+                new_version.remove_content(to_remove, progress_bar=pb)
+    finally:
+        models.StagedResource.discard(add_content_units)
+        models.StagedResource.discard(remove_content_units)
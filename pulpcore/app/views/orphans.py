@@ -10,7 +10,9 @@ class OrphansView(APIView):
     def delete(self, request, format=None):
         """
         Cleans up all the Content and Artifact orphans in the system
+
+        Only one cleanup runs at a time, concurrently with the other tasks.
         """
-        async_result = enqueue_with_reservation(orphan_cleanup, [])
+        async_result = enqueue_with_reservation(orphan_cleanup, [request.path])
 
         return OperationPostponedResponse(async_result, request)
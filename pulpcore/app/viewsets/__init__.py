@@ -4,6 +4,7 @@ from .content import (  # noqa
     ArtifactViewSet,
     ContentFilter,
     ContentViewSet,
+    UploadViewSet,
 )
 from .custom_filters import (  # noqa
     IsoDateTimeFilter,
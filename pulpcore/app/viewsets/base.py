@@ -157,6 +157,56 @@ class NamedModelViewSet(viewsets.GenericViewSet):
             raise DRFValidationError(detail=_('URI {u} is not a valid {m}.').format(
                 u=uri, m=model._meta.model_name))
 
+    @staticmethod
+    def get_resource_pks(uris, model):
+        """
+        Resolve many resource URIs to the primary keys of the resources.
+
+        The URIs are parsed without touching the DB and grouped by the ViewSet they resolve to.
+        The existence of the resources is then validated with one query per ViewSet, instead of
+        one query per URI as with get_resource(). URIs which don't identify the resource by
+        primary key are resolved with get_resource().
+
+        Args:
+            uris (list): Of resource URIs.
+            model (django.models.Model): A model class each resource must be an instance of.
+
+        Returns:
+            list: The primary keys of the resources, in the order of ``uris``.
+
+        Raises:
+            rest_framework.exceptions.ValidationError: on invalid URI or resource not found.
+        """
+        pks = []
+        uris_by_viewset = {}
+        for uri in uris:
+            try:
+                match = resolve(urlparse(uri).path)
+            except Resolver404:
+                raise DRFValidationError(detail=_('URI not valid: {u}').format(u=uri))
+            viewset = getattr(match.func, 'cls', None)
+            if 'pk' not in match.kwargs or getattr(viewset, 'queryset', None) is None:
+                pks.append(NamedModelViewSet.get_resource(uri, model).pk)
+                continue
+            if not issubclass(viewset.queryset.model, model):
+                raise DRFValidationError(detail=_('URI {u} is not a valid {m}.').format(
+                    u=uri, m=model._meta.model_name))
+            try:
+                pk = model._meta.pk.to_python(match.kwargs['pk'])
+            except ValidationError:
+                raise DRFValidationError(detail=_('ID invalid: {u}').format(u=match.kwargs['pk']))
+            uris_by_viewset.setdefault(viewset, {})[pk] = uri
+            pks.append(pk)
+
+        for viewset, uris_by_pk in uris_by_viewset.items():
+            found = viewset.queryset.filter(pk__in=list(uris_by_pk)).values_list('pk', flat=True)
+            found = set(found)
+            for pk, uri in uris_by_pk.items():
+                if pk not in found:
+                    raise DRFValidationError(detail=_('URI {u} not found for {m}.').format(
+                        u=uri, m=model._meta.model_name))
+        return pks
+
     @classmethod
     def is_master_viewset(cls):
         # ViewSet isn't related to a model, so it can't represent a master model
@@ -1,20 +1,40 @@
 from gettext import gettext as _
-
-from django.db import models
-from rest_framework import status, mixins
-from rest_framework.parsers import MultiPartParser, FormParser
+import re
+
+from django.db import IntegrityError, models
+from django.urls import reverse
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, mixins, serializers
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
-from pulpcore.app.models import Artifact, Content
-from pulpcore.app.serializers import ArtifactSerializer, MultipleArtifactContentSerializer
+from pulpcore.app import tasks
+from pulpcore.app.models import Artifact, Content, Upload
+from pulpcore.app.response import OperationPostponedResponse
+from pulpcore.app.serializers import (
+    ArtifactImportSerializer,
+    ArtifactLookupSerializer,
+    ArtifactSerializer,
+    ArtifactVerifySerializer,
+    AsyncOperationResponseSerializer,
+    MultipleArtifactContentSerializer,
+    UploadCommitSerializer,
+    UploadSerializer,
+)
 from pulpcore.app.viewsets.base import BaseFilterSet, NamedModelViewSet
 
+from pulpcore.exceptions import DigestValidationError
+from pulpcore.tasking.tasks import enqueue_with_reservation
+
 from .custom_filters import (
     ContentRepositoryVersionFilter,
     ContentAddedRepositoryVersionFilter,
     ContentRemovedRepositoryVersionFilter,
 )
 
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
 
 class ArtifactFilter(BaseFilterSet):
     """
@@ -41,6 +61,74 @@ class ArtifactViewSet(NamedModelViewSet,
     filterset_class = ArtifactFilter
     parser_classes = (MultiPartParser, FormParser)
 
+    @swagger_auto_schema(operation_description="Find the Artifacts with any of the given "
+                                               "checksums.",
+                         request_body=ArtifactLookupSerializer)
+    @list_route(methods=('post',), parser_classes=(JSONParser,))
+    def lookup(self, request):
+        """
+        Find the Artifacts matching a batch of checksums of any allowed algorithms in one query.
+
+        The Artifacts found are listed with their checksums, the checksums not found are absent.
+        """
+        serializer = ArtifactLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        q = models.Q()
+        for algorithm, digests in serializer.validated_data.items():
+            if digests:
+                q |= models.Q(**{algorithm + '__in': set(digests)})
+        if not q:
+            return Response({'results': []})
+
+        digest_fields = Artifact.allowed_digest_fields()
+        results = []
+        for artifact in Artifact.objects.filter(q).values('pk', *digest_fields).iterator():
+            entry = {'_href': reverse('artifacts-detail', kwargs={'pk': artifact.pop('pk')})}
+            entry.update(artifact)
+            results.append(entry)
+        return Response({'results': results})
+
+    @swagger_auto_schema(operation_description="Trigger an asynchronous task to create "
+                                               "Artifacts from the files of a directory on the "
+                                               "server.",
+                         request_body=ArtifactImportSerializer,
+                         responses={202: AsyncOperationResponseSerializer})
+    @list_route(methods=('post',), url_path='import', parser_classes=(JSONParser,))
+    def import_directory(self, request):
+        """
+        Queues a task that imports the files of a directory within the ALLOWED_IMPORT_PATHS.
+        """
+        serializer = ArtifactImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        path = serializer.validated_data['path']
+        result = enqueue_with_reservation(
+            tasks.artifact.import_directory, [path],
+            kwargs={'path': path}
+        )
+        return OperationPostponedResponse(result, request)
+
+    @swagger_auto_schema(operation_description="Trigger an asynchronous task to verify the "
+                                               "files of the Artifacts against their sha256 "
+                                               "checksum, and repair the broken ones.",
+                         request_body=ArtifactVerifySerializer,
+                         responses={202: AsyncOperationResponseSerializer})
+    @list_route(methods=('post',), parser_classes=(JSONParser,))
+    def verify(self, request):
+        """
+        Queues a task that verifies the Artifact files. Only one verification runs at a time.
+        """
+        serializer = ArtifactVerifySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = enqueue_with_reservation(
+            tasks.artifact.verify, [request.path],
+            kwargs={
+                'max_age': serializer.validated_data.get('max_age'),
+                'repair': serializer.validated_data['repair'],
+                'max_bandwidth': serializer.validated_data.get('max_bandwidth'),
+            }
+        )
+        return OperationPostponedResponse(result, request)
+
     def destroy(self, request, pk):
         """
         Remove Artifact only if it is not associated with any Content.
@@ -53,6 +141,71 @@ class ArtifactViewSet(NamedModelViewSet,
             return Response(data, status=status.HTTP_409_CONFLICT)
 
 
+class UploadViewSet(NamedModelViewSet,
+                    mixins.CreateModelMixin,
+                    mixins.RetrieveModelMixin,
+                    mixins.ListModelMixin,
+                    mixins.DestroyModelMixin):
+    """
+    Upload a file in chunks, then commit it to create an Artifact.
+
+    Chunks are sent with PUT requests whose body is the chunk and whose Content-Range header is
+    its byte range, e.g. 'bytes 0-1048575/10737418240'. They can be sent in any order and
+    concurrently, and the ranges which weren't uploaded yet are listed by the Upload.
+    """
+    endpoint_name = 'uploads'
+    queryset = Upload.objects.all()
+    serializer_class = UploadSerializer
+
+    @swagger_auto_schema(operation_description="Upload a chunk of the file. The body is the "
+                                               "chunk and the Content-Range header is its "
+                                               "byte range.")
+    def update(self, request, pk):
+        """
+        Write the chunk in the body of the request at the range of its Content-Range header.
+        """
+        upload = self.get_object()
+        match = CONTENT_RANGE_RE.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not match:
+            raise serializers.ValidationError(_("A Content-Range header of the form "
+                                                "'bytes <first>-<last>/<size>' is required."))
+        first, last, total = match.groups()
+        first, last = int(first), int(last)
+        if last < first or last >= upload.size or total not in ('*', str(upload.size)):
+            raise serializers.ValidationError(_("The Content-Range is not within the file."))
+
+        size = last - first + 1
+        if request.stream is None or upload.write_chunk(request.stream, first, size) != size:
+            raise serializers.ValidationError(_("The chunk is shorter than its Content-Range."))
+        return Response(self.get_serializer(upload).data)
+
+    @swagger_auto_schema(operation_description="Create an Artifact from the uploaded file and "
+                                               "delete the upload.",
+                         request_body=UploadCommitSerializer,
+                         responses={201: ArtifactSerializer})
+    @detail_route(methods=('post',))
+    def commit(self, request, pk):
+        """
+        Validate the uploaded file against the expected checksums and create its Artifact.
+        """
+        upload = self.get_object()
+        serializer = UploadCommitSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        missing = upload.missing_ranges()
+        if missing:
+            raise serializers.ValidationError(_("%d byte ranges of the file weren't uploaded.")
+                                              % len(missing))
+        try:
+            artifact = upload.commit(expected_digests=serializer.validated_data)
+        except DigestValidationError:
+            raise serializers.ValidationError(_("A checksum did not match."))
+        except IntegrityError:
+            raise serializers.ValidationError(_("An Artifact with the same checksums already "
+                                                "exists."))
+        data = ArtifactSerializer(artifact, context={'request': request}).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
 class ContentFilter(BaseFilterSet):
     """
     Plugin content filters should:
@@ -1,13 +1,17 @@
 from django_filters.rest_framework import filters, DjangoFilterBackend
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import mixins
 from rest_framework.filters import OrderingFilter
 
+from pulpcore.app import tasks
 from pulpcore.app.models import (
     ContentGuard,
     Distribution,
     Publication,
 )
+from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import (
+    AsyncOperationResponseSerializer,
     ContentGuardSerializer,
     DistributionSerializer,
     PublicationSerializer,
@@ -17,6 +21,7 @@ from pulpcore.app.viewsets import (
     NamedModelViewSet
 )
 from pulpcore.app.viewsets.base import NAME_FILTER_OPTIONS
+from pulpcore.tasking.tasks import enqueue_with_reservation
 
 
 class PublicationViewSet(NamedModelViewSet,
@@ -29,6 +34,20 @@ class PublicationViewSet(NamedModelViewSet,
     filter_backends = (OrderingFilter, DjangoFilterBackend)
     ordering = ('-_created',)
 
+    @swagger_auto_schema(operation_description="Trigger an asynchronous task to delete a "
+                                               "publication.",
+                         responses={202: AsyncOperationResponseSerializer})
+    def destroy(self, request, pk):
+        """
+        Generates a Task to delete a Publication
+        """
+        publication = self.get_object()
+        async_result = enqueue_with_reservation(
+            tasks.publication.delete, [publication],
+            kwargs={'publication_pk': publication.pk}
+        )
+        return OperationPostponedResponse(async_result, request)
+
 
 class ContentGuardFilter(BaseFilterSet):
     name = filters.CharFilter()
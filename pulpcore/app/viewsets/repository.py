@@ -1,24 +1,30 @@
 from gettext import gettext as _
-import itertools
+from urllib.parse import urlencode
 
+from django.db.models import Count, Exists, OuterRef, Q
+from django.urls import reverse
 from django_filters.rest_framework import filters, DjangoFilterBackend
 from django_filters import Filter
 from drf_yasg.utils import swagger_auto_schema
 
 from rest_framework import mixins, serializers
+from rest_framework.decorators import detail_route, list_route
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
 from pulpcore.app import tasks
 from pulpcore.app.models import (
     Content,
+    ContentArtifact,
     Exporter,
     Remote,
     Publisher,
     Repository,
     RepositoryContent,
-    RepositoryVersion
+    RepositoryVersion,
+    StagedResource
 )
-from pulpcore.app.pagination import NamePagination
+from pulpcore.app.pagination import IDPagination, NamePagination
 from pulpcore.app.response import OperationPostponedResponse
 from pulpcore.app.serializers import (
     AsyncOperationResponseSerializer,
@@ -27,7 +33,8 @@ from pulpcore.app.serializers import (
     PublisherSerializer,
     RepositorySerializer,
     RepositoryVersionSerializer,
-    RepositoryVersionCreateSerializer
+    RepositoryVersionCreateSerializer,
+    RepositoryVersionMembershipSerializer
 )
 from pulpcore.app.viewsets import (
     AsyncRemoveMixin,
@@ -37,6 +44,7 @@ from pulpcore.app.viewsets import (
 )
 from pulpcore.app.viewsets.custom_filters import IsoDateTimeFilter
 from pulpcore.app.viewsets.base import NAME_FILTER_OPTIONS, DATETIME_FILTER_OPTIONS
+from pulpcore.app.util import get_view_name_for_model
 from pulpcore.tasking.tasks import enqueue_with_reservation
 
 
@@ -92,16 +100,48 @@ class RepositoryViewSet(NamedModelViewSet,
         )
         return OperationPostponedResponse(async_result, request)
 
+    @swagger_auto_schema(operation_description="List the ranges of repository versions, of "
+                                               "every repository, which contain the content "
+                                               "given by the comma separated 'content' hrefs.")
+    @list_route(methods=('get',))
+    def content_versions(self, request):
+        """
+        Find every range of repository versions in which some content is contained.
+
+        The ranges are read from the RepositoryContent of the content in a single query, so the
+        cost doesn't depend on the number of versions. A range with a null 'last_version' still
+        contains the content in the latest version of the repository.
+        """
+        hrefs = request.query_params.get('content')
+        if not hrefs:
+            raise serializers.ValidationError(
+                detail=_("The 'content' parameter must be specified."))
+        hrefs = hrefs.split(',')
+        content_hrefs = dict(zip(self.get_resource_pks(hrefs, Content), hrefs))
+
+        memberships = RepositoryContent.objects.filter(
+            content_id__in=content_hrefs
+        ).values_list(
+            'repository_id', 'content_id', 'number_added', 'number_removed'
+        ).order_by('repository_id', 'content_id', 'number_added')
+
+        results = []
+        for repository_id, content_id, number_added, number_removed in memberships:
+            results.append({
+                'repository': reverse('repositories-detail', kwargs={'pk': repository_id}),
+                'content': content_hrefs[content_id],
+                'first_version': number_added,
+                'last_version': number_removed - 1 if number_removed is not None else None,
+            })
+        return Response({'results': results})
+
 
 class RepositoryVersionContentFilter(Filter):
     """
     Filter used to get the repository versions where some given content can be found.
 
-    Given a content_href, this filter will:
-        1. Get the RepositoryContent that the content can be found in
-        2. Get a list of version_added and version_removed where the content was
-           changed on the repository
-        3. Calculate and return the versions that the content can be found on
+    Given one or more comma separated content hrefs, this filter matches the versions numbered
+    within the range of any RepositoryContent of the content, in a single query.
     """
 
     def __init__(self, *args, **kwargs):
@@ -112,10 +152,10 @@ class RepositoryVersionContentFilter(Filter):
         """
         Args:
             qs (django.db.models.query.QuerySet): The RepositoryVersion Queryset
-            value (string): of content href to filter
+            value (string): of comma separated content hrefs to filter
 
         Returns:
-            Queryset of the RepositoryVersions containing the specified content
+            Queryset of the RepositoryVersions containing any of the specified content
         """
 
         if value is None:
@@ -125,43 +165,15 @@ class RepositoryVersionContentFilter(Filter):
         if not value:
             raise serializers.ValidationError(detail=_('No value supplied for content filter'))
 
-        # Get the content object from the content_href
-        content = NamedModelViewSet.get_resource(value, Content)
-
-        # Get the repository from the parent request.
-        repository_pk = self.parent.request.parser_context['kwargs']['repository_pk']
-        repository = Repository.objects.get(pk=repository_pk)
-
-        repository_content_set = RepositoryContent.objects.filter(content=content,
-                                                                  repository=repository)
-
-        # Get the sorted list of version_added and version_removed.
-        version_added = list(repository_content_set.values_list('version_added__number', flat=True))
-
-        # None values have to be filtered out from version_removed,
-        # in order for zip_longest to pass it a default fillvalue
-        version_removed = list(filter(None.__ne__, repository_content_set
-                                      .values_list('version_removed__number', flat=True)))
-
-        # The range finding should work as long as both lists are sorted
-        # Why it works: https://gist.github.com/werwty/6867f83ae5adbae71e452c28ecd9c444
-        version_added.sort()
-        version_removed.sort()
+        content_pks = NamedModelViewSet.get_resource_pks(value.split(','), Content)
 
-        # Match every version_added to a version_removed, if len(version_removed)
-        # is shorter than len(version_added), pad out the remaining space with the current
-        # repository version +1 (the +1 is to the current version gets included when we
-        # calculate range)
-        version_tuples = itertools.zip_longest(version_added, version_removed,
-                                               fillvalue=repository.last_version + 1)
+        memberships = RepositoryContent.objects.filter(
+            repository_id=OuterRef('repository_id'),
+            content_id__in=content_pks,
+            number_added__lte=OuterRef('number'),
+        ).filter(Q(number_removed__isnull=True) | Q(number_removed__gt=OuterRef('number')))
 
-        # Get the ranges between paired version_added and version_removed to get all
-        # the versions the content is present in.
-        versions = [list(range(added, removed)) for (added, removed) in version_tuples]
-        # Flatten the list of lists
-        versions = list(itertools.chain.from_iterable(versions))
-
-        return qs.filter(number__in=versions)
+        return qs.annotate(contains_content=Exists(memberships)).filter(contains_content=True)
 
 
 class RepositoryVersionFilter(BaseFilterSet):
@@ -171,16 +183,18 @@ class RepositoryVersionFilter(BaseFilterSet):
     # /?_created__gte=2018-04-12T19:45
     # /?_created__range=2018-04-12T19:45,2018-04-13T20:00
     # /?content=http://localhost:8000/pulp/api/v3/content/file/fb8ad2d0-03a8-4e36-a209-77763d4ed16c/
+    # /?content__in=/pulp/api/v3/content/file/1/,/pulp/api/v3/content/file/2/
     number = filters.NumberFilter()
     _created = IsoDateTimeFilter()
     content = RepositoryVersionContentFilter()
+    content__in = RepositoryVersionContentFilter(
+        help_text=_('Comma separated Content Units referenced by HREF'))
 
     class Meta:
         model = RepositoryVersion
         fields = {
             'number': ['exact', 'lt', 'lte', 'gt', 'gte', 'range'],
             '_created': DATETIME_FILTER_OPTIONS,
-            'content': ['exact', 'in']
         }
 
 
@@ -223,8 +237,6 @@ class RepositoryVersionViewSet(NamedModelViewSet,
         """
         Queues a task that creates a new RepositoryVersion by adding and removing content units
         """
-        add_content_units = []
-        remove_content_units = []
         repository = self.get_parent_object()
 
         if 'base_version' in request.data:
@@ -232,27 +244,189 @@ class RepositoryVersionViewSet(NamedModelViewSet,
         else:
             base_version_pk = None
 
-        if 'add_content_units' in request.data:
-            for url in request.data['add_content_units']:
-                content = self.get_resource(url, Content)
-                add_content_units.append(content.pk)
-
-        if 'remove_content_units' in request.data:
-            for url in request.data['remove_content_units']:
-                content = self.get_resource(url, Content)
-                remove_content_units.append(content.pk)
+        add_content_units = self.get_resource_pks(request.data.get('add_content_units', []),
+                                                  Content)
+        remove_content_units = self.get_resource_pks(
+            request.data.get('remove_content_units', []), Content)
+
+        add_content_units = StagedResource.stage(add_content_units)
+        remove_content_units = StagedResource.stage(remove_content_units)
+        try:
+            result = enqueue_with_reservation(
+                tasks.repository.add_and_remove, [repository],
+                kwargs={
+                    'repository_pk': repository_pk,
+                    'base_version_pk': base_version_pk,
+                    'add_content_units': add_content_units,
+                    'remove_content_units': remove_content_units
+                }
+            )
+        except Exception:
+            StagedResource.discard(add_content_units)
+            StagedResource.discard(remove_content_units)
+            raise
+        return OperationPostponedResponse(result, request)
 
+    @swagger_auto_schema(operation_description="Trigger an asynchronous task to create a new "
+                                               "repository whose first version has the content "
+                                               "of this repository version.",
+                         request_body=RepositorySerializer,
+                         responses={202: AsyncOperationResponseSerializer})
+    @detail_route(methods=('post',))
+    def clone(self, request, repository_pk, number):
+        """
+        Queues a task that clones this RepositoryVersion into a new Repository
+        """
+        version = self.get_object()
+        serializer = RepositorySerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
         result = enqueue_with_reservation(
-            tasks.repository.add_and_remove, [repository],
+            tasks.repository.clone, [version.repository],
             kwargs={
-                'repository_pk': repository_pk,
-                'base_version_pk': base_version_pk,
-                'add_content_units': add_content_units,
-                'remove_content_units': remove_content_units
+                'repository_version_pk': version.pk,
+                'name': serializer.validated_data['name'],
+                'description': serializer.validated_data.get('description', ''),
             }
         )
         return OperationPostponedResponse(result, request)
 
+    @swagger_auto_schema(operation_description="List the content added and removed between "
+                                               "the 'base_version' repository version, of any "
+                                               "repository, and this repository version.")
+    @detail_route(methods=('get',))
+    def diff(self, request, repository_pk, number):
+        """
+        Compare this RepositoryVersion to another one.
+
+        The difference is paginated by content with a keyset: the 'next' link carries the 'after'
+        parameter, which is the last content of the page. Summaries count the content added and
+        removed by type. They cost as much as the whole difference, so only the first page has
+        them, and they are null on the next pages.
+        """
+        version = self.get_object()
+        base_href = request.query_params.get('base_version')
+        if not base_href:
+            raise serializers.ValidationError(
+                detail=_("The 'base_version' parameter must be specified."))
+        base_version = self.get_resource(base_href, RepositoryVersion)
+        try:
+            after = int(request.query_params.get('after', 0))
+            page_size = int(request.query_params.get('page_size',
+                                                     IDPagination.page_size or 100))
+        except ValueError:
+            raise serializers.ValidationError(
+                detail=_("The 'after' and 'page_size' parameters must be integers."))
+        page_size = max(1, min(page_size, IDPagination.max_page_size))
+
+        diff = version.content_diff(base_version)
+        page = list(diff.filter(content_id__gt=after)[:page_size + 1])
+        next_link = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_link = '{path}?{query}'.format(path=request.path, query=urlencode({
+                'base_version': base_href,
+                'page_size': page_size,
+                'after': page[-1]['content_id'],
+            }))
+
+        def summary(added):
+            if after:
+                return None
+            content = Content.objects.filter(pk__in=diff.filter(added=added).values('content_id'))
+            annotated = content.order_by().values('_type').annotate(count=Count('_type'))
+            return {c['_type']: c['count'] for c in annotated}
+
+        view_names = self._content_view_names(page)
+        results = []
+        for entry in page:
+            view_name = view_names[entry['content___type']]
+            results.append({
+                '_href': reverse(view_name, kwargs={'pk': entry['content_id']}) if view_name
+                else None,
+                '_type': entry['content___type'],
+                'change': 'added' if entry['added'] else 'removed',
+            })
+
+        return Response({
+            'base_version': base_href,
+            'content_added_summary': summary(1),
+            'content_removed_summary': summary(0),
+            'next': next_link,
+            'results': results,
+        })
+
+    @swagger_auto_schema(operation_description="Check which of a batch of content units, "
+                                               "referenced by href or by artifact digest, are "
+                                               "contained in this repository version.",
+                         request_body=RepositoryVersionMembershipSerializer)
+    @detail_route(methods=('post',))
+    def contains(self, request, repository_pk, number):
+        """
+        Check the membership of a batch of content units in this RepositoryVersion.
+
+        Each kind of identifier is checked with a single query joining the identified content to
+        the memberships of the version. Content hrefs must reference existing content.
+        """
+        version = self.get_object()
+        serializer = RepositoryVersionMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        content_hrefs = serializer.validated_data['content_hrefs']
+        artifacts = serializer.validated_data['artifacts']
+
+        content_pks = dict(zip(content_hrefs, self.get_resource_pks(content_hrefs, Content)))
+        present = set(version._content_relationships().filter(
+            content_id__in=set(content_pks.values())).values_list('content_id', flat=True))
+
+        digests = {}
+        for artifact in artifacts:
+            algorithm = next(key for key in artifact if key != 'relative_path')
+            digests.setdefault(algorithm, set()).add(artifact[algorithm])
+        found = set()
+        membership = version._membership_q(prefix='content__version_memberships__')
+        for algorithm, values in digests.items():
+            content_artifacts = ContentArtifact.objects.filter(
+                membership, **{'artifact__{alg}__in'.format(alg=algorithm): values}
+            ).values_list('artifact__' + algorithm, 'relative_path')
+            for digest, relative_path in content_artifacts:
+                found.add((algorithm, digest, relative_path))
+                found.add((algorithm, digest, None))
+
+        results = []
+        for artifact in artifacts:
+            algorithm = next(key for key in artifact if key != 'relative_path')
+            key = (algorithm, artifact[algorithm], artifact.get('relative_path'))
+            results.append(dict(artifact, present=key in found))
+
+        return Response({
+            'content_hrefs': {href: pk in present for href, pk in content_pks.items()},
+            'artifacts': results,
+        })
+
+    @staticmethod
+    def _content_view_names(entries):
+        """
+        Find the detail view name of each content type found in a page of a diff.
+
+        Only one unit of each type is cast, so the hrefs of a page cost one query per type.
+
+        Args:
+            entries (list): Of dicts with the 'content_id' and 'content___type' keys.
+
+        Returns:
+            dict: {<_type>: <view name>} where the view name is None for types without a viewset.
+        """
+        view_names = {}
+        for entry in entries:
+            ctype = entry['content___type']
+            if ctype in view_names:
+                continue
+            ctype_model = Content.objects.get(pk=entry['content_id']).cast().__class__
+            try:
+                view_names[ctype] = get_view_name_for_model(ctype_model, 'detail')
+            except LookupError:
+                view_names[ctype] = None
+        return view_names
+
     def get_serializer_class(self):
         if self.action == 'create':
             return RepositoryVersionCreateSerializer
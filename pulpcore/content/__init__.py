@@ -20,5 +20,9 @@ async def server(*args, **kwargs):
                                                            module=CONTENT_MODULE_NAME)
             with suppress(ModuleNotFoundError):
                 import_module(content_module_name)
-    app.add_routes([web.get(settings.CONTENT_PATH_PREFIX + '{path:.+}', Handler().stream_content)])
+    handler = Handler()
+    app.add_routes([
+        web.get(settings.CONTENT_PATH_PREFIX + '{path:.+}', handler.stream_content),
+        web.post(settings.CONTENT_PATH_PREFIX + '{path:.+}', handler.stream_bundle),
+    ])
     return app
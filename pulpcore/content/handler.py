@@ -1,6 +1,9 @@
 from gettext import gettext as _
+import asyncio
 import logging
 import os
+import tarfile
+import time
 
 # https://github.com/rochacbruno/dynaconf/issues/89
 from dynaconf.contrib import django_dynaconf  # noqa
@@ -10,11 +13,23 @@ django.setup()  # noqa otherwise E402: module level not at top of file
 
 from aiohttp.client_exceptions import ClientResponseError
 from aiohttp.web import FileResponse, StreamResponse
-from aiohttp.web_exceptions import HTTPForbidden, HTTPFound, HTTPNotFound
+from aiohttp.web_exceptions import (
+    HTTPBadRequest,
+    HTTPConflict,
+    HTTPForbidden,
+    HTTPFound,
+    HTTPNotFound,
+)
 from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.db import IntegrityError, transaction
-from pulpcore.app.models import Artifact, ContentArtifact, Distribution, Remote
+from pulpcore.app.models import (
+    Artifact,
+    ContentArtifact,
+    Distribution,
+    PublishedMetadata,
+    Remote,
+)
 
 
 log = logging.getLogger(__name__)
@@ -41,6 +56,13 @@ class ArtifactNotFound(Exception):
     pass
 
 
+class FileSizeMismatch(Exception):
+    """
+    A file streamed in a bundle does not have the size its tar header was written with.
+    """
+    pass
+
+
 HOP_BY_HOP_HEADERS = [
     'connection',
     'keep-alive',
@@ -50,6 +72,9 @@ HOP_BY_HOP_HEADERS = [
     'upgrade',
 ]
 
+# The number of bytes read from storage at a time when streaming a bundle.
+BUNDLE_CHUNK_SIZE = 1048576  # 1 megabyte
+
 
 class Handler:
 
@@ -67,6 +92,53 @@ class Handler:
         path = request.match_info['path']
         return await self._match_and_stream(path, request)
 
+    async def stream_bundle(self, request):
+        """
+        The bundle request handler for the Content app.
+
+        Streams many published files of a single distribution back to the client as one tar
+        archive. The request path is the base path of the distribution and the JSON body
+        selects the files using either a list of relative paths or a relative path prefix:
+
+            {"paths": ["a/b.txt", "c.txt"]}
+            {"prefix": "a/"}
+
+        Args:
+            request (:class:`aiohttp.web.request`): The request from the client.
+
+        Returns:
+            :class:`aiohttp.web.StreamResponse`: The tar archive streamed back to the client.
+        """
+        path = request.match_info['path']
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPBadRequest(reason=_('The request body must be valid JSON.'))
+        if not isinstance(body, dict):
+            raise HTTPBadRequest(reason=_('The request body must be a JSON object.'))
+        paths = body.get('paths')
+        prefix = body.get('prefix')
+        if (paths is None) == (prefix is None):
+            raise HTTPBadRequest(reason=_("Either 'paths' or 'prefix' must be specified."))
+        if paths is not None and (not isinstance(paths, list) or
+                                  not all(isinstance(p, str) for p in paths)):
+            raise HTTPBadRequest(reason=_("'paths' must be a list of relative paths."))
+        if prefix is not None and not isinstance(prefix, str):
+            raise HTTPBadRequest(reason=_("'prefix' must be a relative path."))
+
+        distribution = Handler._match_bundle_distribution(path)
+        self._permit(request, distribution)
+        publication = distribution.publication
+        if not publication:
+            raise PathNotResolved(path)
+        entries = self._match_bundle(publication, paths=paths, prefix=prefix)
+        if paths is not None:
+            missing = [p for p in paths if p.lstrip('/') not in entries]
+            if missing:
+                raise PathNotResolved(path, text=_('Not found: {paths}').format(
+                    paths=', '.join(missing)))
+        return await self._stream_bundle(request, distribution, entries)
+
     @staticmethod
     def _base_paths(path):
         """
@@ -111,6 +183,26 @@ class Handler:
             ))
             raise PathNotResolved(path)
 
+    @staticmethod
+    def _match_bundle_distribution(path):
+        """
+        Match a distribution using its complete base path.
+
+        Args:
+            path (str): The path component of the URL.
+
+        Returns:
+            Distribution: The matched distribution.
+
+        Raises:
+            PathNotResolved: when not matched.
+        """
+        try:
+            return Distribution.objects.get(base_path=path.strip('/'))
+        except ObjectDoesNotExist:
+            log.debug(_('Distribution not matched for bundle {path}').format(path=path))
+            raise PathNotResolved(path)
+
     @staticmethod
     def _permit(request, distribution):
         """
@@ -213,6 +305,151 @@ class Handler:
                     return await self._stream_content_artifact(request, StreamResponse(), ca)
         raise PathNotResolved(path)
 
+    @staticmethod
+    def _match_bundle(publication, paths=None, prefix=None):
+        """
+        Resolve the files of a bundle with one query per kind of published file.
+
+        Published artifacts take precedence over published metadata which takes precedence over
+        pass-through content, the same as for single file requests.
+
+        Args:
+            publication (:class:`pulpcore.plugin.models.Publication`): The publication served by
+                the matched distribution.
+            paths (list): Relative paths to be resolved.
+            prefix (str): A relative path prefix matching the paths to be resolved.
+
+        Raises:
+            MultipleObjectsReturned: When pass-through content has the same relative path twice.
+            :class:`aiohttp.web_exceptions.HTTPConflict`: When content which has not been
+                downloaded into Pulp yet (on-demand) is matched. It is only streamed by single file
+                requests.
+
+        Returns:
+            dict: The matched files as {<relative_path>: (<file>, <size>)}. The order is the order
+                of ``paths`` or, when matching a ``prefix``, sorted by relative path.
+        """
+        if paths is not None:
+            paths = [p.lstrip('/') for p in paths]
+            match = {'relative_path__in': paths}
+        else:
+            match = {'relative_path__startswith': prefix.lstrip('/')}
+
+        # relative_path -> artifact pk, None when the artifact is not downloaded yet.
+        artifact_paths = dict(publication.published_artifact.filter(**match).values_list(
+            'relative_path', 'content_artifact__artifact'))
+
+        metadata = {}
+        for pm in PublishedMetadata.objects.filter(publication=publication, **match):
+            if pm.relative_path not in artifact_paths:
+                metadata[pm.relative_path] = pm.file
+
+        if publication.pass_through:
+            content_artifacts = ContentArtifact.objects.filter(
+                content__in=publication.repository_version.content, **match
+            ).values_list('relative_path', 'artifact')
+            pass_through = {}
+            for relative_path, artifact_pk in content_artifacts:
+                if relative_path in metadata or relative_path in artifact_paths:
+                    continue
+                if relative_path in pass_through:
+                    log.error(_('Multiple (pass-through) matches for {p} in a bundle').format(
+                        p=relative_path))
+                    raise MultipleObjectsReturned()
+                pass_through[relative_path] = artifact_pk
+            artifact_paths.update(pass_through)
+
+        on_demand = sorted(p for p, artifact_pk in artifact_paths.items() if not artifact_pk)
+        if on_demand:
+            raise HTTPConflict(text=_('Not downloaded yet: {paths}').format(
+                paths=', '.join(on_demand)))
+
+        found = {}
+        artifacts = Artifact.objects.in_bulk(artifact_paths.values())
+        for relative_path, artifact_pk in artifact_paths.items():
+            artifact = artifacts[artifact_pk]
+            found[relative_path] = (artifact.file, artifact.size)
+        for relative_path, file in metadata.items():
+            found[relative_path] = (file, file.size)
+
+        if paths is not None:
+            ordered = paths
+        else:
+            ordered = sorted(found)
+        return {p: found[p] for p in ordered if p in found}
+
+    async def _stream_bundle(self, request, distribution, entries):
+        """
+        Stream the matched files back to the client as a tar archive.
+
+        Each file is read sequentially from storage and written to the response behind its tar
+        header, so only a single chunk is held in memory at a time. The response is aborted when
+        a file doesn't have the expected size, so the client never gets a malformed archive.
+
+        Args:
+            request(:class:`~aiohttp.web.Request`): The request to prepare a response for.
+            distribution (:class:`pulpcore.plugin.models.Distribution`): The matched distribution.
+            entries (dict): The files to stream as {<relative_path>: (<file>, <size>)}.
+
+        Raises:
+            FileSizeMismatch: When a file doesn't have the expected size.
+
+        Returns:
+            :class:`aiohttp.web.StreamResponse`: The response streamed back to the client.
+        """
+        loop = asyncio.get_event_loop()
+        name = os.path.basename(distribution.base_path.rstrip('/')) or distribution.name
+        response = StreamResponse(headers={
+            'Content-Type': 'application/x-tar',
+            'Content-Disposition': 'attachment; filename="{name}.tar"'.format(name=name),
+        })
+        await response.prepare(request)
+
+        mtime = int(time.time())
+        written = 0
+        for relative_path, (file, size) in entries.items():
+            info = tarfile.TarInfo(name=relative_path)
+            info.size = size
+            info.mtime = mtime
+            header = info.tobuf(format=tarfile.PAX_FORMAT)
+            await response.write(header)
+            written += len(header)
+
+            fp = await loop.run_in_executor(None, file.storage.open, file.name, 'rb')
+            try:
+                copied = 0
+                while copied < size:
+                    chunk = await loop.run_in_executor(
+                        None, fp.read, min(BUNDLE_CHUNK_SIZE, size - copied))
+                    if not chunk:
+                        break
+                    await response.write(chunk)
+                    copied += len(chunk)
+                if copied == size and await loop.run_in_executor(None, fp.read, 1):
+                    copied += 1
+            finally:
+                fp.close()
+            if copied != size:
+                # The archive can't be framed anymore, the response is aborted unfinished
+                log.error(_('The file {name} of {path} is not {size} bytes, the bundle is '
+                            'aborted').format(name=file.name, path=relative_path, size=size))
+                raise FileSizeMismatch(relative_path)
+
+            remainder = size % tarfile.BLOCKSIZE
+            if remainder:
+                await response.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+            written += size + (tarfile.BLOCKSIZE - remainder if remainder else 0)
+
+        # The archive ends with two empty blocks and is padded to a whole record.
+        trailer = 2 * tarfile.BLOCKSIZE
+        written += trailer
+        remainder = written % tarfile.RECORDSIZE
+        if remainder:
+            trailer += tarfile.RECORDSIZE - remainder
+        await response.write(tarfile.NUL * trailer)
+        await response.write_eof()
+        return response
+
     async def _stream_content_artifact(self, request, response, content_artifact):
         """
         Stream and optionally save a ContentArtifact by requesting it using the associated remote.
@@ -1,3 +1,9 @@
 from .base import PulpException, exception_to_dict, ResourceImmutableError  # noqa
 from .http import MissingResource  # noqa
-from .validation import DigestValidationError, SizeValidationError, ValidationError  # noqa
+from .validation import (  # noqa
+    ArtifactIntegrityError,
+    DigestValidationError,
+    SizeValidationError,
+    UnsupportedDigestValidationError,
+    ValidationError,
+)
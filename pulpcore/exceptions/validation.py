@@ -32,3 +32,40 @@ class SizeValidationError(ValidationError):
 
     def __str__(self):
         return _("A file failed validation due to size.")
+
+
+class UnsupportedDigestValidationError(ValidationError):
+    """
+    Raised when a file is expected to have a digest checksum which isn't computed.
+    """
+
+    def __init__(self):
+        super().__init__("PLP0005")
+
+    def __str__(self):
+        return _("A file could not be validated with a checksum which isn't allowed.")
+
+
+class ArtifactIntegrityError(ValidationError):
+    """
+    Raised when the file of an Artifact is missing or doesn't match its sha256 digest.
+    """
+
+    def __init__(self, artifact_pk, path, missing):
+        """
+        Args:
+            artifact_pk (int): The primary key of the Artifact.
+            path (str): The path of its file.
+            missing (bool): Whether the file is missing, rather than corrupt.
+        """
+        super().__init__("PLP0006")
+        self.artifact_pk = artifact_pk
+        self.path = path
+        self.missing = missing
+
+    def __str__(self):
+        if self.missing:
+            msg = _("The file {path} of Artifact {pk} is missing.")
+        else:
+            msg = _("The file {path} of Artifact {pk} is corrupt.")
+        return msg.format(path=self.path, pk=self.artifact_pk)
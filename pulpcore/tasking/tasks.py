@@ -8,7 +8,7 @@ from django.db.models import Model
 from rq import Queue
 from rq.job import get_current_job, Job
 
-from pulpcore.app.models import Task, ReservedResource, Worker
+from pulpcore.app.models import Task, Worker
 from pulpcore.constants import TASK_STATES
 from pulpcore.tasking import connection, util
 
@@ -76,23 +76,7 @@ def _queue_reserved_task(func, inner_job_id, resources, inner_args, inner_kwargs
     """
     redis_conn = connection.get_redis_connection()
     task_status = Task.objects.get(job_id=inner_job_id)
-    task_name = func.__module__ + '.' + func.__name__
     while True:
-        if task_name == "pulpcore.app.tasks.orphan.orphan_cleanup":
-            if ReservedResource.objects.exists():
-                # wait until there are no reservations
-                time.sleep(0.25)
-                continue
-            else:
-                task_status.state = TASK_STATES.RUNNING
-                task_status.save()
-                q = Queue('resource-manager', connection=redis_conn, is_async=False)
-                q.enqueue(func, args=inner_args, kwargs=inner_kwargs, job_id=inner_job_id,
-                          timeout=TASK_TIMEOUT, **options)
-                task_status.state = TASK_STATES.COMPLETED
-                task_status.save()
-                return
-
         try:
             worker = _acquire_worker(resources)
         except Worker.DoesNotExist:
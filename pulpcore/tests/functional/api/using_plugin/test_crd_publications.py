@@ -181,8 +181,13 @@ class PublicationsTestCase(unittest.TestCase):
 
     @skip_if(bool, 'publication', False)
     def test_07_delete(self):
-        """Delete a publication."""
-        self.client.delete(self.publication['_href'])
+        """Delete a publication.
+
+        The publication is deleted by a task, the response is 202 with the task.
+        """
+        response = api.Client(self.cfg, api.echo_handler).delete(self.publication['_href'])
+        self.assertEqual(response.status_code, 202)
+        api.poll_spawned_tasks(self.cfg, response.json())
         with self.assertRaises(HTTPError):
             self.client.get(self.publication['_href'])
 
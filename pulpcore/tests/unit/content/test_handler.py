@@ -1,9 +1,16 @@
-from unittest.mock import Mock
+import asyncio
+from io import BytesIO
+import tarfile
+from unittest.mock import Mock, patch
 
+from aiohttp.web_exceptions import HTTPConflict
+from django.core.exceptions import MultipleObjectsReturned
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
+from pulpcore.app.models import Publication, Repository, RepositoryVersion, Task
 from pulpcore.content import Handler
+from pulpcore.content.handler import FileSizeMismatch
 from pulpcore.plugin.models import Artifact, Content, ContentArtifact
 
 
@@ -43,3 +50,101 @@ class HandlerSaveContentTestCase(TestCase):
         c2 = Content.objects.get(pk=self.c2.pk)
         self.assertEqual(existing_artifact.pk, new_artifact.pk)
         self.assertEqual(c2._artifacts.get().pk, existing_artifact.pk)
+
+
+class HandlerMatchBundleTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = patch('pulpcore.app.models.task.get_current_job',
+                        return_value=Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='bundle')
+
+    def publish(self, *relative_paths, downloaded=True):
+        contents = []
+        for relative_path in relative_paths:
+            content = Content.objects.create()
+            artifact = None
+            if downloaded:
+                sha256 = str(len(contents)) * 64
+                Artifact.objects.bulk_create([Artifact(file=relative_path, size=1, sha256=sha256)])
+                artifact = Artifact.objects.get(sha256=sha256)
+            ContentArtifact.objects.create(artifact=artifact, content=content,
+                                           relative_path=relative_path)
+            contents.append(content.pk)
+        with RepositoryVersion.create(self.repository) as version:
+            version.add_content(Content.objects.filter(pk__in=contents))
+        return Publication.objects.create(repository_version=version, pass_through=True)
+
+    def test_match_prefix(self):
+        """Pass-through files under a prefix are matched in the order of their paths."""
+        publication = self.publish('a/2', 'a/1', 'b/1')
+
+        entries = Handler._match_bundle(publication, prefix='/a/')
+
+        self.assertEqual(list(entries), ['a/1', 'a/2'])
+        self.assertEqual([size for file, size in entries.values()], [1, 1])
+
+    def test_duplicate_pass_through_paths(self):
+        """The same relative path of two content units fails, like for single files."""
+        publication = self.publish('a', 'a')
+
+        with self.assertRaises(MultipleObjectsReturned):
+            Handler._match_bundle(publication, paths=['a'])
+
+    def test_on_demand(self):
+        """Content which isn't downloaded yet fails instead of being left out."""
+        publication = self.publish('a', downloaded=False)
+
+        with self.assertRaises(HTTPConflict):
+            Handler._match_bundle(publication, prefix='')
+
+
+class HandlerStreamBundleTestCase(TestCase):
+
+    class Response:
+
+        def __init__(self, headers=None):
+            self.headers = headers
+            self.data = BytesIO()
+
+        async def prepare(self, request):
+            pass
+
+        async def write(self, data):
+            self.data.write(data)
+
+        async def write_eof(self):
+            pass
+
+    def file_mock(self, data):
+        file = Mock()
+        file.name = 'file'
+        file.storage.open.side_effect = lambda name, mode: BytesIO(data)
+        return file
+
+    def stream(self, entries):
+        distribution = Mock(base_path='dist')
+        with patch('pulpcore.content.handler.StreamResponse', self.Response):
+            return asyncio.get_event_loop().run_until_complete(
+                Handler()._stream_bundle(Mock(), distribution, entries))
+
+    def test_tar_framing(self):
+        """The files are framed as a tar archive padded to whole records."""
+        entries = {'a/1': (self.file_mock(b'1'), 1), 'b': (self.file_mock(b'2' * 1000), 1000)}
+
+        response = self.stream(entries)
+
+        data = response.data.getvalue()
+        self.assertEqual(len(data) % tarfile.RECORDSIZE, 0)
+        with tarfile.open(fileobj=BytesIO(data)) as tar:
+            self.assertEqual(tar.getnames(), ['a/1', 'b'])
+            self.assertEqual(tar.extractfile('b').read(), b'2' * 1000)
+
+    def test_size_mismatch(self):
+        """A file shorter or longer than its size aborts the bundle."""
+        for data in (b'12', b'1234'):
+            with self.assertRaises(FileSizeMismatch):
+                self.stream({'a': (self.file_mock(data), 3)})
@@ -0,0 +1,59 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from pulpcore.app.models import Content, Repository, RepositoryVersion, Task
+
+
+class BackfillContentSummariesTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.contents = [Content.objects.create() for i in range(3)]
+        self._type = self.contents[0]._type
+
+    def new_repository(self, name):
+        c = self.contents
+        repository = Repository.objects.create(name=name)
+        with RepositoryVersion.create(repository) as version:
+            version.add_content(Content.objects.filter(pk__in=[c[0].pk, c[1].pk]))
+        with RepositoryVersion.create(repository) as version:
+            version.add_content(Content.objects.filter(pk=c[2].pk))
+            version.remove_content(Content.objects.filter(pk=c[0].pk))
+        repository.versions.update(content_summary=None, content_added_summary=None,
+                                   content_removed_summary=None)
+        return repository
+
+    def summaries(self, repository):
+        return list(repository.versions.order_by('number').values_list(
+            'content_summary', 'content_added_summary', 'content_removed_summary'))
+
+    def test_backfill(self):
+        """The summaries of versions without one are stored, oldest first."""
+        repository = self.new_repository('backfill')
+        stdout = StringIO()
+
+        call_command('backfill-content-summaries', stdout=stdout)
+
+        self.assertEqual(self.summaries(repository), [
+            ({self._type: 2}, {self._type: 2}, {}),
+            ({self._type: 2}, {self._type: 1}, {self._type: 1}),
+        ])
+        self.assertIn('2 repository versions', stdout.getvalue())
+
+    def test_repository(self):
+        """Only the versions of the named repository are backfilled."""
+        repository = self.new_repository('backfill')
+        other = self.new_repository('other')
+
+        call_command('backfill-content-summaries', repository='other', stdout=StringIO())
+
+        self.assertEqual(self.summaries(repository), [(None, None, None)] * 2)
+        summary = ({self._type: 2}, {self._type: 1}, {self._type: 1})
+        self.assertEqual(self.summaries(other)[1], summary)
@@ -0,0 +1,105 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from pulpcore.app.models import Content, Repository, RepositoryContent, RepositoryVersion, Task
+
+
+class RepositoryContentTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='partition')
+        self.contents = [Content.objects.create() for i in range(3)]
+        c = self.contents
+        self.first = self.new_version(add=c[:2])
+        self.second = self.new_version(add=c[2:], remove=c[:1])
+
+    def new_version(self, add=(), remove=()):
+        with RepositoryVersion.create(self.repository) as version:
+            version.add_content(Content.objects.filter(pk__in=[c.pk for c in add]))
+            version.remove_content(Content.objects.filter(pk__in=[c.pk for c in remove]))
+        return version
+
+    def call(self, name, *args):
+        stdout = StringIO()
+        call_command(name, *args, stdout=stdout)
+        return stdout.getvalue()
+
+
+class PartitionRepositoryContentTestCase(RepositoryContentTestCase):
+
+    def setUp(self):
+        if connection.vendor != 'postgresql' or connection.pg_version < 110000:
+            self.skipTest('Hash partitioning requires PostgreSQL 11 or later.')
+        super().setUp()
+
+    def layout(self):
+        table = RepositoryContent._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT relkind FROM pg_class WHERE oid = %s::regclass', [table])
+            kind = cursor.fetchone()[0]
+            cursor.execute('SELECT count(*) FROM pg_inherits WHERE inhparent = %s::regclass',
+                           [table])
+            return kind, cursor.fetchone()[0]
+
+    def test_partition_and_merge(self):
+        """The rows are kept, and usable, when the table is partitioned and merged back."""
+        rows = set(RepositoryContent.objects.values_list('pk', 'content_id', 'number_added',
+                                                         'number_removed'))
+
+        output = self.call('partition-repository-content', '--partitions=4')
+
+        self.assertIn('Moved 3 rows into 4 partitions', output)
+        self.assertEqual(self.layout(), ('p', 4))
+        self.assertEqual(set(RepositoryContent.objects.values_list(
+            'pk', 'content_id', 'number_added', 'number_removed')), rows)
+        self.assertEqual(set(self.second.content), set(self.contents[1:]))
+        third = self.new_version(add=self.contents[:1])
+        self.assertEqual(set(third.content), set(self.contents))
+
+        output = self.call('partition-repository-content', '--merge')
+
+        self.assertIn('Merged 4 rows into a single table', output)
+        self.assertEqual(self.layout(), ('r', 0))
+        self.assertEqual(set(third.content), set(self.contents))
+        self.assertEqual(set(self.first.content), set(self.contents[:2]))
+
+    def test_invalid_layouts(self):
+        """Partitioning needs 2 partitions, and an unpartitioned table to start from."""
+        with self.assertRaises(CommandError):
+            self.call('partition-repository-content', '--partitions=1')
+        with self.assertRaises(CommandError):
+            self.call('partition-repository-content', '--merge')
+
+        self.call('partition-repository-content', '--partitions=2')
+
+        with self.assertRaises(CommandError):
+            self.call('partition-repository-content', '--partitions=2')
+
+
+class BenchmarkRepositoryContentTestCase(RepositoryContentTestCase):
+
+    def test_benchmark(self):
+        """Each query of the repository is timed."""
+        output = self.call('benchmark-repository-content', 'partition', '--iterations=2')
+
+        self.assertIn('Layout: single table', output)
+        for line in ('membership: 2 rows', 'diff: 2 rows', 'added: 1 rows', 'removed: 1 rows'):
+            self.assertIn(line, output)
+
+    def test_invalid_repository(self):
+        """The repository must exist and have versions."""
+        Repository.objects.create(name='empty')
+
+        with self.assertRaises(CommandError):
+            self.call('benchmark-repository-content', 'missing')
+        with self.assertRaises(CommandError):
+            self.call('benchmark-repository-content', 'empty')
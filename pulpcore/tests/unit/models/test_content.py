@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from pulpcore.app.files import PulpTemporaryUploadedFile
+from pulpcore.app.models import Artifact
+from pulpcore.exceptions import DigestValidationError, UnsupportedDigestValidationError
+
+DATA = b'0123456789'
+
+
+class BulkGetOrCreateTestCase(TestCase):
+
+    def setUp(self):
+        # The existing Artifact has no sha512 digest, like one created before it was allowed
+        Artifact.objects.bulk_create([Artifact(file='existing', size=1, sha256='a' * 64)])
+        self.existing = Artifact.objects.get(sha256='a' * 64)
+
+    def test_conflict_with_existing_row(self):
+        """An Artifact conflicting with a row which lacks its lookup digest gets the row."""
+        artifacts = Artifact.objects.bulk_get_or_create([
+            Artifact(file='new', size=1, sha256='b' * 64, sha512='b' * 128),
+            Artifact(file='conflict', size=1, sha256='a' * 64, sha512='a' * 128),
+        ])
+
+        self.assertEqual(artifacts[0], Artifact.objects.get(sha256='b' * 64))
+        self.assertEqual(artifacts[1].pk, self.existing.pk)
+        self.assertEqual(Artifact.objects.count(), 2)
+
+
+@override_settings(ALLOWED_CONTENT_CHECKSUMS=['sha256', 'sha512'])
+class AllowedChecksumsTestCase(TestCase):
+
+    def digest(self, algorithm):
+        return hashlib.new(algorithm, DATA).hexdigest()
+
+    def path(self):
+        fd, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(DATA)
+        return path
+
+    def uploaded_file(self):
+        file = PulpTemporaryUploadedFile('file', 'application/octet-stream', len(DATA), None)
+        self.addCleanup(file.close)
+        file.hasher.update(DATA)
+        file.write(DATA)
+        file.hasher.flush()
+        return file
+
+    def test_allowed_digest_fields(self):
+        """Only the allowed digests are listed, ordered by strength."""
+        self.assertEqual(Artifact.allowed_digest_fields(), ('sha512', 'sha256'))
+
+    def test_init_and_validate(self):
+        """Only the allowed digests are stored, but any expected digest of a path is checked."""
+        artifact = Artifact.init_and_validate(self.path(), expected_digests={
+            'md5': self.digest('md5'), 'sha256': self.digest('sha256')})
+
+        self.assertEqual((artifact.sha256, artifact.sha512),
+                         (self.digest('sha256'), self.digest('sha512')))
+        self.assertEqual((artifact.md5, artifact.sha1, artifact.sha224, artifact.sha384),
+                         (None, None, None, None))
+        with self.assertRaises(DigestValidationError):
+            Artifact.init_and_validate(self.path(), expected_digests={'md5': 'a' * 32})
+
+    def test_init_and_validate_uploaded_file(self):
+        """An uploaded file can't be checked against a digest which wasn't computed."""
+        artifact = Artifact.init_and_validate(self.uploaded_file(), expected_digests={
+            'sha512': self.digest('sha512')})
+
+        self.assertEqual(artifact.sha256, self.digest('sha256'))
+        self.assertIsNone(artifact.md5)
+        with self.assertRaises(UnsupportedDigestValidationError):
+            Artifact.init_and_validate(self.uploaded_file(),
+                                       expected_digests={'md5': self.digest('md5')})
+
+    def test_q(self):
+        """Artifacts are matched by their strongest allowed digest."""
+        artifact = Artifact(md5='a' * 32, sha256='b' * 64)
+
+        self.assertEqual(artifact.q().children, [('sha256', 'b' * 64)])
+
+    def test_invalid_setting(self):
+        """The setting must contain sha256, and only known checksums."""
+        config = apps.get_app_config('pulp_app')
+        for checksums in (['sha512'], ['sha256', 'blake2b']):
+            with self.settings(ALLOWED_CONTENT_CHECKSUMS=checksums):
+                with self.assertRaises(ImproperlyConfigured):
+                    config.ready()
@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.app.models import (
+    Content,
+    Publication,
+    Repository,
+    RepositoryContent,
+    RepositoryVersion,
+    Task,
+)
+
+
+class RepositoryVersionTestCase(TestCase):
+
+    def setUp(self):
+        # Versions are created by a task, which is recorded with them
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='squash')
+        self.content = Content.objects.create()
+
+    def new_version(self, add=False, remove=False):
+        content = Content.objects.filter(pk=self.content.pk)
+        with RepositoryVersion.create(self.repository) as version:
+            if add:
+                version.add_content(content)
+            if remove:
+                version.remove_content(content)
+        self.repository.refresh_from_db()
+        return version
+
+    def test_version_numbers(self):
+        """Memberships record the numbers of the versions adding and removing content."""
+        versions = [self.new_version(add=True), self.new_version(), self.new_version(remove=True)]
+
+        relation = RepositoryContent.objects.get(repository=self.repository)
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 3))
+        self.assertEqual([list(version.content) for version in versions],
+                         [[self.content], [self.content], []])
+
+        versions.append(self.new_version(add=True))
+
+        relation = RepositoryContent.objects.get(repository=self.repository,
+                                                 version_added=versions[3])
+        self.assertEqual((relation.number_added, relation.number_removed), (4, None))
+        self.assertEqual(list(versions[2].content), [])
+        self.assertEqual(list(versions[3].content), [self.content])
+
+    def test_content_summaries(self):
+        """Completed versions store the counts of content they contain, add and remove."""
+        _type = self.content._type
+        other = Content.objects.create()
+        with RepositoryVersion.create(self.repository) as first:
+            first.add_content(Content.objects.filter(pk__in=[self.content.pk, other.pk]))
+        second = self.new_version(remove=True)
+
+        first.refresh_from_db()
+        self.assertEqual(first.content_summary, {_type: 2})
+        self.assertEqual(first.content_added_summary, {_type: 2})
+        self.assertEqual(first.content_removed_summary, {})
+        self.assertEqual(second.content_summary, {_type: 1})
+        self.assertEqual(second.content_added_summary, {})
+        self.assertEqual(second.content_removed_summary, {_type: 1})
+
+        # Without the summary of the previous version, it's counted over the whole content
+        RepositoryVersion.objects.filter(pk=second.pk).update(content_summary=None)
+        third = self.new_version(add=True)
+        self.assertEqual(third.content_summary, {_type: 2})
+
+    def test_under_retention_limit(self):
+        """No version is squashed while the repository has fewer versions than retained."""
+        self.repository.retained_versions = 5
+        self.repository.save()
+        versions = [self.new_version(add=True), self.new_version(), self.new_version()]
+        Publication.objects.create(repository_version=versions[1])
+        versions.append(self.new_version())
+
+        self.assertEqual(self.repository.versions.count(), 4)
+
+    def test_delete_version_between_removals(self):
+        """Deleting the version removing content, which is added back and removed again."""
+        versions = [self.new_version(add=True), self.new_version(remove=True),
+                    self.new_version(add=True), self.new_version(remove=True)]
+
+        versions[1].delete()
+
+        relation = RepositoryContent.objects.get(repository=self.repository)
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 4))
+        self.assertTrue(versions[2].contains(self.content))
+        self.assertFalse(versions[3].contains(self.content))
+
+    def test_squash_versions_between_removals(self):
+        """Retention squashes versions removing content, which is added back and removed later."""
+        versions = [self.new_version(add=True), self.new_version(remove=True),
+                    self.new_version(add=True), self.new_version(), self.new_version(remove=True)]
+        Publication.objects.create(repository_version=versions[0])
+        self.repository.retained_versions = 3
+        self.repository.save()
+
+        self.new_version()
+
+        self.assertEqual(list(self.repository.versions.order_by('number')
+                              .values_list('number', flat=True)), [1, 4, 5, 6])
+        relation = RepositoryContent.objects.get(repository=self.repository)
+        self.assertEqual((relation.number_added, relation.number_removed), (1, 5))
+
+    @mock.patch('pulpcore.app.models.repository.CONTENT_CHUNK_SIZE', 1)
+    def test_reconcile_in_chunks(self):
+        """A version based on an earlier one gets its content, whatever the chunk size."""
+        contents = [self.content, Content.objects.create(), Content.objects.create()]
+        with RepositoryVersion.create(self.repository) as first:
+            first.add_content(Content.objects.filter(pk__in=[c.pk for c in contents[:2]]))
+        with RepositoryVersion.create(self.repository) as second:
+            second.add_content(Content.objects.filter(pk=contents[2].pk))
+            second.remove_content(Content.objects.filter(pk__in=[c.pk for c in contents[:2]]))
+
+        with RepositoryVersion.create(self.repository, base_version=first) as third:
+            pass
+
+        self.assertEqual(set(third.content), set(contents[:2]))
+        self.assertEqual(set(third.removed()), {contents[2]})
+
+    def test_bitmap_of_content_removed_and_added_back(self):
+        """Content removed from a base version and added back is in the bitmap of the version."""
+        contents = [self.content, Content.objects.create(), Content.objects.create()]
+        with RepositoryVersion.create(self.repository) as first:
+            first.add_content(Content.objects.filter(pk__in=[c.pk for c in contents[:2]]))
+        with RepositoryVersion.create(self.repository) as second:
+            second.add_content(Content.objects.filter(pk=contents[2].pk))
+            second.remove_content(Content.objects.filter(pk=contents[1].pk))
+
+        with RepositoryVersion.create(self.repository, base_version=first) as third:
+            third.add_content(Content.objects.filter(pk=contents[2].pk))
+
+        third = RepositoryVersion.objects.get(pk=third.pk)
+        self.assertEqual(set(third.content_bitmap()),
+                         set(third.content.values_list('pk', flat=True)))
+        self.assertEqual(set(third.content_bitmap()), {c.pk for c in contents})
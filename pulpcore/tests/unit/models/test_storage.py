@@ -0,0 +1,180 @@
+import errno
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock, skipUnless
+
+from pulpcore.app.models import storage
+
+DATA = b'0123456789' * 1000
+
+
+def failing(function, source, error):
+    """Wrap an os function to fail with ``error`` for paths below ``source``."""
+    def wrapper(src, dst, *args, **kwargs):
+        if src.startswith(source):
+            raise OSError(error, os.strerror(error))
+        return function(src, dst, *args, **kwargs)
+    return wrapper
+
+
+class StorageTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source = os.path.join(self.directory, 'source', 'file')
+        self.destination = os.path.join(self.directory, 'destination', 'file')
+        os.makedirs(os.path.dirname(self.source))
+        self.write(self.source, DATA)
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def across_devices(self):
+        """Make renaming and hardlinking the source fail like they do across filesystems."""
+        source = os.path.dirname(self.source)
+        for name in ('rename', 'link'):
+            patcher = mock.patch.object(
+                storage.os, name, failing(getattr(os, name), source, errno.EXDEV)
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertPlaced(self, data):
+        self.assertEqual(self.read(self.destination), data)
+        self.assertEqual(os.listdir(os.path.dirname(self.destination)), ['file'])
+
+
+class MoveFileTestCase(StorageTestCase):
+
+    def test_rename(self):
+        """A file is renamed over the destination within one filesystem."""
+        self.write(self.destination, b'old')
+        with mock.patch.object(storage, 'link_file') as link_file:
+            self.assertTrue(storage.move_file(self.source, self.destination, replace=True))
+        link_file.assert_not_called()
+        self.assertPlaced(DATA)
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_keep_existing(self):
+        """An existing destination is kept, and the source removed, unless replace is set."""
+        self.write(self.destination, b'old')
+        self.assertFalse(storage.move_file(self.source, self.destination))
+        self.assertPlaced(b'old')
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_across_devices(self):
+        """A file is copied and its source removed when it can't be renamed or hardlinked."""
+        self.across_devices()
+        self.assertTrue(storage.move_file(self.source, self.destination))
+        self.assertPlaced(DATA)
+        self.assertFalse(os.path.exists(self.source))
+
+    def test_across_devices_replace(self):
+        """A copy replaces an existing destination when replace is set."""
+        self.across_devices()
+        self.write(self.destination, b'old')
+        self.assertTrue(storage.move_file(self.source, self.destination, replace=True))
+        self.assertPlaced(DATA)
+
+
+class LinkFileTestCase(StorageTestCase):
+
+    def test_link(self):
+        """A file is hardlinked within one filesystem."""
+        self.assertTrue(storage.link_file(self.source, self.destination))
+        self.assertTrue(os.path.samefile(self.source, self.destination))
+
+    def test_keep_existing(self):
+        """An existing destination is kept by a hardlink."""
+        self.write(self.destination, b'old')
+        self.assertFalse(storage.link_file(self.source, self.destination))
+        self.assertPlaced(b'old')
+
+    def test_copy_keep_existing(self):
+        """An existing destination is kept by a copy, and the copy removed."""
+        self.across_devices()
+        self.write(self.destination, b'old')
+        self.assertFalse(storage.link_file(self.source, self.destination))
+        self.assertPlaced(b'old')
+        self.assertEqual(self.read(self.source), DATA)
+
+    def test_copy_without_hardlinks(self):
+        """A copy is renamed into place on filesystems without hardlinks."""
+        link = mock.patch.object(storage.os, 'link', side_effect=OSError(errno.EPERM, 'link'))
+        with link:
+            self.assertTrue(storage.link_file(self.source, self.destination))
+            self.write(self.source, b'new')
+            self.assertFalse(storage.link_file(self.source, self.destination))
+        self.assertPlaced(DATA)
+
+    def test_replace(self):
+        """A copy replaces an existing destination when replace is set."""
+        self.write(self.destination, b'old')
+        self.assertTrue(storage.link_file(self.source, self.destination, replace=True))
+        self.assertPlaced(DATA)
+        self.assertFalse(os.path.samefile(self.source, self.destination))
+
+    def test_failed_copy(self):
+        """A copy failing part-way leaves no file at the destination."""
+        def copy(src, dst):
+            dst.write(DATA[:10])
+            dst.flush()
+            raise OSError(errno.EIO, 'copy')
+
+        self.across_devices()
+        with mock.patch.object(storage, '_clone', return_value=False), \
+                mock.patch.object(storage, '_copy', side_effect=copy):
+            with self.assertRaises(OSError):
+                storage.link_file(self.source, self.destination)
+        self.assertEqual(os.listdir(os.path.dirname(self.destination)), [])
+
+
+class CopyTestCase(StorageTestCase):
+
+    def copy(self, function):
+        with open(self.source, 'rb') as src, open(self.destination, 'wb') as dst:
+            function(src, dst)
+
+    def test_clone_unsupported(self):
+        """A file isn't cloned when the filesystem can't share its data."""
+        os.makedirs(os.path.dirname(self.destination))
+        ioctl = OSError(errno.EOPNOTSUPP, 'ioctl')
+        with mock.patch.object(storage, 'fcntl') as fcntl:
+            fcntl.ioctl.side_effect = ioctl
+            self.copy(lambda src, dst: self.assertFalse(storage._clone(src, dst)))
+        with mock.patch.object(storage, 'fcntl', None):
+            self.copy(lambda src, dst: self.assertFalse(storage._clone(src, dst)))
+
+    @skipUnless(hasattr(os, 'copy_file_range'), 'copy_file_range() is not available')
+    def test_copy_file_range(self):
+        """A file is copied with copy_file_range()."""
+        os.makedirs(os.path.dirname(self.destination))
+        self.copy(lambda src, dst: storage._copy_file_range(src.fileno(), dst.fileno(), len(DATA)))
+        self.assertPlaced(DATA)
+
+    def test_sendfile(self):
+        """A file is copied with sendfile()."""
+        os.makedirs(os.path.dirname(self.destination))
+        self.copy(lambda src, dst: storage._sendfile(src.fileno(), dst.fileno(), len(DATA)))
+        self.assertPlaced(DATA)
+
+    def test_copy_fallback(self):
+        """A file is copied in python when the kernel can't copy it."""
+        os.makedirs(os.path.dirname(self.destination))
+
+        def partial(src_fd, dst_fd, size):
+            os.write(dst_fd, DATA[:10])
+            raise OSError(errno.EXDEV, 'copy')
+
+        with mock.patch.object(storage, '_copy_file_range', side_effect=partial), \
+                mock.patch.object(storage, '_sendfile', side_effect=partial):
+            self.copy(storage._copy)
+        self.assertPlaced(DATA)
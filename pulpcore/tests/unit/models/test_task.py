@@ -1,7 +1,13 @@
 from django.db.models import ProtectedError
 from django.test import TestCase
 
-from pulpcore.app.models import ReservedResource, Task, TaskReservedResource, Worker
+from pulpcore.app.models import (
+    ReservedResource,
+    StagedResource,
+    Task,
+    TaskReservedResource,
+    Worker,
+)
 
 
 class TaskTestCase(TestCase):
@@ -19,3 +25,17 @@ class TaskTestCase(TestCase):
         task.release_resources()
         task.delete()
         self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+
+
+class StagedResourceTestCase(TestCase):
+    def test_discard(self):
+        """
+        Tests that discarding a staged set deletes it only, and that lists are ignored
+        """
+        discarded = StagedResource.stage([1, 2, 2])
+        kept = StagedResource.stage([2])
+        self.assertEqual(StagedResource.objects.filter(set_id=discarded).count(), 2)
+        StagedResource.discard(discarded)
+        StagedResource.discard([2])
+        self.assertFalse(StagedResource.objects.filter(set_id=discarded).exists())
+        self.assertTrue(StagedResource.objects.filter(set_id=kept).exists())
@@ -0,0 +1,98 @@
+from datetime import timedelta
+import hashlib
+from io import BytesIO
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pulpcore.app.models import Artifact, Upload
+from pulpcore.app.models.storage import get_artifact_path
+from pulpcore.app.tasks.orphan import orphan_cleanup
+from pulpcore.exceptions import DigestValidationError
+
+DATA = b'0123456789'
+
+
+class UploadTestCase(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.upload = Upload(size=len(DATA))
+        self.upload.save()
+
+    @mock.patch('django.db.transaction.on_commit', lambda func: func())
+    def test_out_of_order_chunks(self):
+        """Chunks written in any order make the file, which is hashed when it's committed."""
+        self.assertEqual(self.upload.write_chunk(BytesIO(DATA[5:]), 5, 5), 5)
+        self.assertEqual(self.upload.missing_ranges(), [(0, 4)])
+        self.assertEqual(self.upload.write_chunk(BytesIO(DATA[:5]), 0, 5), 5)
+        self.assertEqual(self.upload.missing_ranges(), [])
+
+        artifact = self.upload.commit()
+
+        self.assertEqual(artifact.sha256, hashlib.sha256(DATA).hexdigest())
+        self.assertFalse(Upload.objects.filter(pk=self.upload.pk).exists())
+        self.assertFalse(os.path.exists(self.upload.file.name))
+        with open(get_artifact_path(artifact.sha256), 'rb') as f:
+            self.assertEqual(f.read(), DATA)
+
+    def test_failed_commit(self):
+        """A commit failing in the database leaves the Upload and its file as they were."""
+        self.upload.write_chunk(BytesIO(DATA), 0, len(DATA))
+
+        with mock.patch.object(Artifact, 'save', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.upload.commit()
+
+        self.assertTrue(Upload.objects.filter(pk=self.upload.pk).exists())
+        self.assertTrue(os.path.exists(self.upload.file.name))
+        self.assertFalse(os.path.exists(get_artifact_path(hashlib.sha256(DATA).hexdigest())))
+
+    def test_resumed_upload(self):
+        """An interrupted chunk isn't recorded, and the upload is resumed by sending it again."""
+        self.upload.write_chunk(BytesIO(DATA[:3]), 0, 3)
+        self.assertEqual(self.upload.write_chunk(BytesIO(DATA[3:6]), 3, 7), 3)
+        self.assertEqual(self.upload.missing_ranges(), [(3, 9)])
+        self.upload.write_chunk(BytesIO(DATA[3:]), 3, 7)
+
+        artifact = self.upload.commit({'sha256': hashlib.sha256(DATA).hexdigest()})
+
+        self.assertEqual(artifact.size, len(DATA))
+
+    def test_commit_digest_mismatch(self):
+        """An upload whose file doesn't match the expected digests is kept."""
+        self.upload.write_chunk(BytesIO(DATA), 0, len(DATA))
+
+        with self.assertRaises(DigestValidationError):
+            self.upload.commit({'sha256': hashlib.sha256(DATA[1:]).hexdigest()})
+
+        self.assertTrue(Upload.objects.filter(pk=self.upload.pk).exists())
+        self.assertTrue(os.path.exists(self.upload.file.name))
+
+    @mock.patch('pulpcore.app.tasks.orphan.ProgressBar')
+    def test_expired_uploads(self, ProgressBar):
+        """Orphan cleanup deletes the expired uploads and the files without an upload."""
+        expired = timezone.now() - timedelta(days=2)
+        Upload.objects.filter(pk=self.upload.pk).update(_created=expired)
+        unknown = os.path.join(os.path.dirname(self.upload.file.name), 'unknown')
+        open(unknown, 'wb').close()
+        os.utime(unknown, (expired.timestamp(), expired.timestamp()))
+        upload = Upload(size=len(DATA))
+        upload.save()
+
+        with self.settings(UPLOAD_EXPIRATION_TIME=60):
+            orphan_cleanup()
+
+        self.assertEqual(list(Upload.objects.all()), [upload])
+        self.assertFalse(os.path.exists(self.upload.file.name))
+        self.assertFalse(os.path.exists(unknown))
+        self.assertTrue(os.path.exists(upload.file.name))
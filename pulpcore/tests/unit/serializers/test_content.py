@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from django.test import override_settings
+from rest_framework import serializers
+
+from pulpcore.app.serializers import ArtifactImportSerializer
+
+
+class TestArtifactImportSerializer(TestCase):
+
+    def setUp(self):
+        self.directory = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.allowed = os.path.join(self.directory, 'allowed')
+        os.makedirs(os.path.join(self.allowed, 'tree'))
+        os.makedirs(os.path.join(self.directory, 'other'))
+        open(os.path.join(self.allowed, 'file'), 'w').close()
+        os.symlink(os.path.join(self.directory, 'other'), os.path.join(self.allowed, 'link'))
+        settings = override_settings(ALLOWED_IMPORT_PATHS=[self.allowed])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def validate_path(self, *path):
+        return ArtifactImportSerializer().validate_path(os.path.join(*path))
+
+    def test_allowed_path(self):
+        """Directories within the allowed import paths are allowed."""
+        self.assertEqual(self.validate_path(self.allowed, 'tree'),
+                         os.path.join(self.allowed, 'tree'))
+        self.assertEqual(self.validate_path(self.allowed), self.allowed)
+
+    def test_invalid_path(self):
+        """Relative paths, files, and paths outside the allowed import paths are rejected."""
+        for path in (('allowed', 'tree'), (self.allowed, 'file'), (self.directory, 'other'),
+                     (self.allowed, 'link'), (self.allowed, '..', 'other'),
+                     (self.allowed, 'missing')):
+            with self.assertRaises(serializers.ValidationError):
+                self.validate_path(*path)
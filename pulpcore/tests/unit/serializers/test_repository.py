@@ -2,9 +2,12 @@ import mock
 from unittest import TestCase
 
 from pulpcore.app.models import Distribution
+from django.test import override_settings
+
 from pulpcore.app.serializers import (
     DistributionSerializer,
     RepositoryPublishURLSerializer,
+    RepositoryVersionMembershipSerializer,
 )
 from rest_framework import serializers
 
@@ -109,3 +112,25 @@ class TestDistributionPath(TestCase):
         serializer = DistributionSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertDictEqual(overlap_errors, serializer.errors)
+
+
+class TestRepositoryVersionMembershipSerializer(TestCase):
+
+    def test_allowed_digest(self):
+        data = {'artifacts': [{'sha256': 'a' * 64, 'relative_path': 'a'}, {'sha1': 'b' * 40}]}
+        serializer = RepositoryVersionMembershipSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['content_hrefs'], [])
+
+    @override_settings(ALLOWED_CONTENT_CHECKSUMS=['sha256', 'sha512'])
+    def test_disallowed_digest(self):
+        serializer = RepositoryVersionMembershipSerializer(data={'artifacts': [{'md5': 'a'}]})
+        self.assertFalse(serializer.is_valid())
+        message = str(serializer.errors['artifacts'][0])
+        self.assertIn('sha512, sha256', message)
+        self.assertNotIn('md5', message)
+
+    def test_several_digests(self):
+        data = {'artifacts': [{'sha256': 'a' * 64, 'sha512': 'b' * 128}]}
+        serializer = RepositoryVersionMembershipSerializer(data=data)
+        self.assertFalse(serializer.is_valid())
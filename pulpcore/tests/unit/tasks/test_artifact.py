@@ -0,0 +1,198 @@
+from datetime import timedelta
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pulpcore.app.models import (
+    Artifact,
+    Content,
+    ContentArtifact,
+    ProgressBar,
+    Remote,
+    RemoteArtifact,
+    Task,
+    storage,
+)
+from pulpcore.app.models.storage import get_artifact_path
+from pulpcore.app.tasks import artifact
+
+
+class ArtifactTaskTestCase(TestCase):
+
+    def setUp(self):
+        self.task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=self.task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(MEDIA_ROOT=os.path.join(self.directory, 'media'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write(self, path, data):
+        path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class ImportDirectoryTestCase(ArtifactTaskTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tree = os.path.join(self.directory, 'import')
+        self.write('import/a/first', b'first')
+        self.write('import/a/duplicate', b'first')
+        self.write('import/b/second', b'second')
+        self.write('import/b/c/existing', b'existing')
+        os.symlink(self.write('outside', b'outside'), os.path.join(self.tree, 'link'))
+        sha256 = hashlib.sha256(b'existing').hexdigest()
+        Artifact.objects.bulk_create([Artifact(file=get_artifact_path(sha256), size=8,
+                                               sha256=sha256)])
+
+    @mock.patch('pulpcore.app.tasks.artifact.IMPORT_BATCH_SIZE', 2)
+    def test_import_directory(self):
+        """Artifacts are created for the files which aren't Artifacts yet, in batches."""
+        artifact.import_directory(self.tree)
+
+        self.assertEqual(Artifact.objects.count(), 3)
+        for data in (b'first', b'second'):
+            created = Artifact.objects.get(sha256=hashlib.sha256(data).hexdigest())
+            self.assertEqual(created.size, len(data))
+            self.assertEqual(created.md5, hashlib.md5(data).hexdigest())
+            self.assertEqual(self.read(get_artifact_path(created.sha256)), data)
+        self.assertFalse(Artifact.objects.filter(
+            sha256=hashlib.sha256(b'outside').hexdigest()).exists())
+        self.assertFalse(os.path.exists(get_artifact_path(hashlib.sha256(b'existing')
+                                                          .hexdigest())))
+        # The directory tree is left untouched
+        self.assertEqual(self.read(os.path.join(self.tree, 'a', 'duplicate')), b'first')
+        progress_bar = ProgressBar.objects.get(task=self.task)
+        self.assertEqual((progress_bar.done, progress_bar.total), (4, 4))
+
+    @override_settings(ALLOWED_CONTENT_CHECKSUMS=['sha256'])
+    def test_allowed_checksums(self):
+        """Only the allowed digests are computed."""
+        artifact.import_directory(os.path.join(self.tree, 'a'))
+
+        created = Artifact.objects.get(sha256=hashlib.sha256(b'first').hexdigest())
+        self.assertIsNone(created.md5)
+
+
+class VerifyTestCase(ArtifactTaskTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.good = self.new_artifact(b'good')
+        self.corrupt = self.new_artifact(b'corrupt', stored=b'broken')
+        self.missing = self.new_artifact(b'missing', stored=None)
+
+    def new_artifact(self, data, stored=True):
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = get_artifact_path(sha256)
+        if stored is not None:
+            self.write(path, data if stored is True else stored)
+        Artifact.objects.bulk_create([Artifact(file=path, size=len(data), sha256=sha256)])
+        return Artifact.objects.get(sha256=sha256)
+
+    def add_remote(self, artifact, name):
+        content = Content.objects.create()
+        content_artifact = ContentArtifact.objects.create(content=content, artifact=artifact,
+                                                          relative_path=name)
+        remote = Remote.objects.create(name=name, url='http://example.com/')
+        RemoteArtifact.objects.create(url='http://example.com/' + name, remote=remote,
+                                      content_artifact=content_artifact)
+
+    def downloader(self, data=None, error=None):
+        """Patch the downloaders of the remotes to download data, or to fail with error."""
+        async def run():
+            if error:
+                raise error
+            path = self.write('download', data)
+            return mock.Mock(path=path,
+                             artifact_attributes={'sha256': hashlib.sha256(data).hexdigest()})
+
+        remote = mock.Mock()
+        remote.get_downloader.return_value.run = run
+        patcher = mock.patch.object(Remote, 'cast', return_value=remote)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def errors(self):
+        self.task.refresh_from_db()
+        return len(self.task.non_fatal_errors)
+
+    def verified(self):
+        return set(Artifact.objects.filter(verified__isnull=False)
+                   .values_list('sha256', flat=True))
+
+    def test_verify(self):
+        """Only the intact files are verified, the others are reported without repair."""
+        artifact.verify(repair=False)
+
+        self.assertEqual(self.verified(), {self.good.sha256})
+        self.assertEqual(self.errors(), 2)
+        self.assertEqual(self.read(self.corrupt.file.name), b'broken')
+
+    def test_max_age(self):
+        """Artifacts verified within max_age days aren't verified again."""
+        recently = timezone.now() - timedelta(hours=1)
+        Artifact.objects.filter(pk=self.corrupt.pk).update(verified=recently)
+        Artifact.objects.filter(pk=self.good.pk).update(verified=recently - timedelta(days=2))
+
+        artifact.verify(max_age=1, repair=False)
+
+        self.assertEqual(self.errors(), 1)
+        self.assertGreater(Artifact.objects.get(pk=self.good.pk).verified, recently)
+        self.assertEqual(Artifact.objects.get(pk=self.corrupt.pk).verified, recently)
+
+    def test_repair(self):
+        """A broken file is replaced by the file downloaded from a remote."""
+        self.add_remote(self.corrupt, 'corrupt')
+        self.downloader(b'corrupt')
+
+        with mock.patch.object(storage, 'move_file', wraps=storage.move_file) as move_file:
+            artifact.verify()
+
+        move_file.assert_called_once_with(os.path.join(self.directory, 'download'),
+                                          self.corrupt.file.name, replace=True)
+        self.assertEqual(self.read(self.corrupt.file.name), b'corrupt')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'download')))
+        self.assertEqual(self.verified(), {self.good.sha256, self.corrupt.sha256})
+        self.assertEqual(self.errors(), 1)
+        repaired = ProgressBar.objects.get(task=self.task, message='Repair Artifacts')
+        self.assertEqual(repaired.done, 1)
+
+    def test_failed_repair(self):
+        """Files which can't be downloaded again, or not with their checksum, are reported."""
+        self.add_remote(self.corrupt, 'corrupt')
+        self.downloader(b'other')
+
+        artifact.verify()
+
+        self.assertEqual(self.read(self.corrupt.file.name), b'broken')
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'download')))
+        self.assertEqual(self.verified(), {self.good.sha256})
+        self.assertEqual(self.errors(), 2)
+
+    def test_failed_download(self):
+        """A failed download leaves the broken file in place."""
+        self.add_remote(self.missing, 'missing')
+        self.downloader(error=OSError('download'))
+
+        artifact.verify()
+
+        self.assertFalse(os.path.exists(self.missing.file.name))
+        self.assertEqual(self.errors(), 2)
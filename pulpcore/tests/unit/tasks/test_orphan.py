@@ -0,0 +1,70 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from pulpcore.app.models import Artifact, Content, StagedResource, Task
+from pulpcore.app.models.task import STAGE_EXPIRATION
+from pulpcore.app.tasks.orphan import orphan_cleanup
+from pulpcore.constants import TASK_STATES
+
+
+@mock.patch('pulpcore.app.tasks.orphan.ProgressBar')
+class OrphanCleanupTestCase(TestCase):
+
+    def setUp(self):
+        # Orphan cleanup removes the unknown files of MEDIA_ROOT/upload
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.orphan = Content.objects.create()
+        Artifact.objects.bulk_create([Artifact(file='orphan', size=1, sha256='a' * 64)])
+        self.artifact = Artifact.objects.get(sha256='a' * 64)
+        Task.objects.create(state=TASK_STATES.RUNNING, started_at=timezone.now())
+        self.created = Content.objects.create()
+
+    def test_running_task_protection(self, ProgressBar):
+        """Orphans created since a running task started are kept, the older ones are not."""
+        with self.settings(ORPHAN_PROTECTION_TIME=0):
+            orphan_cleanup()
+
+        self.assertFalse(Content.objects.filter(pk=self.orphan.pk).exists())
+        self.assertFalse(Artifact.objects.filter(pk=self.artifact.pk).exists())
+        self.assertTrue(Content.objects.filter(pk=self.created.pk).exists())
+
+    def test_reused_protection(self, ProgressBar):
+        """Orphans fetched again by a running task, or staged for a version, are kept."""
+        Artifact.objects.bulk_get_or_create([Artifact(file='reused', size=1, sha256='a' * 64)])
+        StagedResource.stage([self.orphan.pk])
+
+        orphan_cleanup()
+
+        self.assertTrue(Artifact.objects.filter(pk=self.artifact.pk).exists())
+        self.assertTrue(Content.objects.filter(pk=self.orphan.pk).exists())
+
+    @mock.patch('pulpcore.app.tasks.orphan.batched_delete')
+    def test_artifact_batch_referenced(self, batched_delete, ProgressBar):
+        """An Artifact batch referenced meanwhile is skipped, without failing the cleanup."""
+        batched_delete.side_effect = [IntegrityError, None]
+
+        orphan_cleanup()
+
+        # Once for the Artifacts, which aren't selected again, then for the staged resources
+        self.assertEqual(batched_delete.call_count, 2)
+
+    def test_stale_staged_resources(self, ProgressBar):
+        """Staged sets older than the incomplete tasks are deleted, the others are kept."""
+        stale = StagedResource.stage([self.orphan.pk])
+        StagedResource.objects.filter(set_id=stale).update(
+            _created=timezone.now() - STAGE_EXPIRATION * 2)
+        staged = StagedResource.stage([self.created.pk])
+
+        orphan_cleanup()
+
+        self.assertFalse(StagedResource.objects.filter(set_id=stale).exists())
+        self.assertTrue(StagedResource.objects.filter(set_id=staged).exists())
@@ -0,0 +1,41 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.app.models import (
+    CreatedResource,
+    Publication,
+    Repository,
+    RepositoryVersion,
+    Task,
+)
+from pulpcore.app.tasks import publication, repository
+
+
+class DeletePublicationTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repository = Repository.objects.create(name='publication')
+        with RepositoryVersion.create(self.repository) as self.version:
+            pass
+        self.publication = Publication.create(self.version, pass_through=True)
+
+    def test_delete_publication(self):
+        """The CreatedResource of a deleted publication is deleted."""
+        publication.delete(self.publication.pk)
+
+        self.assertFalse(Publication.objects.exists())
+        self.assertEqual([resource.content_object for resource in CreatedResource.objects.all()],
+                         [self.version])
+
+    def test_delete_repository(self):
+        """The CreatedResources of the versions and publications of a repository are deleted."""
+        repository.delete(self.repository.pk)
+
+        self.assertFalse(Publication.objects.exists())
+        self.assertFalse(CreatedResource.objects.exists())
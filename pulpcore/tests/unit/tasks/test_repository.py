@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from pulpcore.app.models import (
+    Content,
+    CreatedResource,
+    Repository,
+    RepositoryContent,
+    RepositoryVersion,
+    RepositoryVersionContentBitmap,
+    Task,
+)
+from pulpcore.app.tasks import repository
+
+
+class CloneTestCase(TestCase):
+
+    def setUp(self):
+        task = Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.source = Repository.objects.create(name='source')
+        self.contents = [Content.objects.create() for i in range(3)]
+        self._type = self.contents[0]._type
+        c = self.contents
+        self.first = self.new_version(add=c[:2])
+        self.second = self.new_version(add=c[2:], remove=c[:1])
+
+    def new_version(self, add=(), remove=()):
+        with RepositoryVersion.create(self.source) as version:
+            version.add_content(Content.objects.filter(pk__in=[c.pk for c in add]))
+            version.remove_content(Content.objects.filter(pk__in=[c.pk for c in remove]))
+        return version
+
+    def clone(self, version, name):
+        repository.clone(version.pk, name, description='cloned')
+        return RepositoryVersion.objects.get(repository__name=name)
+
+    def test_clone(self):
+        """The new repository has a complete first version with the content of the source."""
+        version = self.clone(self.second, 'clone')
+
+        self.assertEqual(version.repository.description, 'cloned')
+        self.assertEqual((version.number, version.repository.last_version), (1, 1))
+        self.assertTrue(version.complete)
+        self.assertEqual(set(version.content), set(self.contents[1:]))
+        self.assertEqual(version.content_summary, {self._type: 2})
+        self.assertEqual(version.content_added_summary, {self._type: 2})
+        self.assertEqual(version.content_removed_summary, {})
+        self.assertEqual(set(RepositoryContent.objects.filter(
+            repository=version.repository
+        ).values_list('number_added', 'number_removed')), {(1, None)})
+        stored = RepositoryVersionContentBitmap.objects.get(repository_version=version)
+        self.assertEqual(stored.bitmap, self.second.content_bitmap().to_bytes())
+        resources = {resource.content_object for resource in CreatedResource.objects.all()}
+        self.assertIn(version, resources)
+        self.assertIn(version.repository, resources)
+
+    def test_clone_older_version(self):
+        """An older version of the source, without a stored summary, is cloned too."""
+        RepositoryVersion.objects.filter(pk=self.first.pk).update(content_summary=None)
+
+        version = self.clone(self.first, 'clone')
+
+        self.assertEqual(set(version.content), set(self.contents[:2]))
+        self.assertEqual(version.content_summary, {self._type: 2})
+        self.assertEqual(set(self.source.versions.get(number=2).content),
+                         set(self.contents[1:]))
@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+from pulpcore.app.bitmap import ContentBitmap
+
+
+class TestContentBitmap(TestCase):
+    def test_from_pks(self):
+        """Every primary key is a member of the bitmap and iterated in order."""
+        bitmap = ContentBitmap.from_pks([9, 1, 70000, 5])
+        self.assertEqual(list(bitmap), [1, 5, 9, 70000])
+        self.assertEqual(len(bitmap), 4)
+        self.assertIn(70000, bitmap)
+        self.assertNotIn(2, bitmap)
+
+    def test_empty(self):
+        """An empty bitmap is falsy and round-trips through its compressed form."""
+        bitmap = ContentBitmap.from_pks([])
+        self.assertFalse(bitmap)
+        self.assertEqual(ContentBitmap.from_bytes(bitmap.to_bytes()), bitmap)
+
+    def test_bytes(self):
+        """The compressed representation round-trips."""
+        bitmap = ContentBitmap.from_pks(range(0, 100000, 7))
+        self.assertEqual(ContentBitmap.from_bytes(bitmap.to_bytes()), bitmap)
+
+    def test_set_algebra(self):
+        """Union, intersection, difference and containment match Python sets."""
+        a, b = {1, 2, 3, 500}, {3, 4, 500, 1000}
+        bitmap_a, bitmap_b = ContentBitmap.from_pks(a), ContentBitmap.from_pks(b)
+        self.assertEqual(set(bitmap_a | bitmap_b), a | b)
+        self.assertEqual(set(bitmap_a & bitmap_b), a & b)
+        self.assertEqual(set(bitmap_a - bitmap_b), a - b)
+        self.assertTrue(ContentBitmap.from_pks(a & b) <= bitmap_a)
+        self.assertFalse(bitmap_a <= bitmap_b)
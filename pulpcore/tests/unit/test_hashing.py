@@ -0,0 +1,28 @@
+import hashlib
+import io
+from unittest import TestCase
+
+from pulpcore.app.hashing import ParallelHasher
+
+
+class TestParallelHasher(TestCase):
+    ALGORITHMS = ('sha512', 'sha256', 'sha1', 'md5')
+
+    def expected(self, data):
+        return {name: hashlib.new(name, data).hexdigest() for name in self.ALGORITHMS}
+
+    def test_update(self):
+        """Chunks of any size are hashed in order by every algorithm."""
+        chunks = [b'a' * 100, bytes(range(256)) * 1000, b'', b'b' * 70000]
+        hasher = ParallelHasher(self.ALGORITHMS)
+        for chunk in chunks:
+            hasher.update(chunk)
+        self.assertEqual(hasher.hexdigests(), self.expected(b''.join(chunks)))
+
+    def test_update_from_file(self):
+        """Reusing the read buffers doesn't corrupt the digests."""
+        data = bytes(range(256)) * 20000
+        hasher = ParallelHasher(self.ALGORITHMS)
+        size = hasher.update_from_file(io.BytesIO(data), chunk_size=65536)
+        self.assertEqual(size, len(data))
+        self.assertEqual(hasher.hexdigests(), self.expected(data))
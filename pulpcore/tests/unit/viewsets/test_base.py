@@ -110,6 +110,37 @@ class TestGetResource(TestCase):
             )
 
 
+class TestGetResourcePks(TestCase):
+    def test_no_errors(self):
+        """
+        Tests that get_resource_pks() resolves valid URIs to primary keys in order.
+        """
+        repo = models.Repository.objects.create(name='foo')
+        repo2 = models.Repository.objects.create(name='foo2')
+        viewset = viewsets.RepositoryViewSet()
+        pks = viewset.get_resource_pks(
+            ["/{api_root}repositories/{pk}/".format(api_root=API_ROOT, pk=repo2.pk),
+             "/{api_root}repositories/{pk}/".format(api_root=API_ROOT, pk=repo.pk)],
+            models.Repository
+        )
+        self.assertEquals([repo2.pk, repo.pk], pks)
+
+    def test_resource_does_not_exist(self):
+        """
+        Tests that get_resource_pks() raises a ValidationError if any URI references a resource
+        that does not exist.
+        """
+        repo = models.Repository.objects.create(name='foo')
+        viewset = viewsets.RepositoryViewSet()
+
+        with self.assertRaises(DRFValidationError):
+            viewset.get_resource_pks(
+                ["/{api_root}repositories/{pk}/".format(api_root=API_ROOT, pk=repo.pk),
+                 "/{api_root}repositories/{pk}/".format(api_root=API_ROOT, pk=500)],
+                models.Repository
+            )
+
+
 class TestGetSerializerClass(TestCase):
 
     def test_must_define_serializer_class(self):
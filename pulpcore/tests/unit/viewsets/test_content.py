@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app import models, viewsets
+
+
+class ArtifactViewSetTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='admin')
+
+    def call(self, action, data):
+        request = APIRequestFactory().post('/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return viewsets.ArtifactViewSet.as_view({'post': action})(request)
+
+
+class LookupTestCase(ArtifactViewSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        models.Artifact.objects.bulk_create([
+            models.Artifact(file='a', size=1, sha256='a' * 64, sha512='a' * 128),
+            models.Artifact(file='b', size=1, sha256='b' * 64, md5='b' * 32),
+            models.Artifact(file='c', size=1, sha256='c' * 64),
+        ])
+
+    def test_lookup(self):
+        """The Artifacts matching any of the checksums are listed with their checksums."""
+        response = self.call('lookup', {'sha256': ['a' * 64, 'd' * 64], 'md5': ['b' * 32]})
+
+        self.assertEqual(response.status_code, 200)
+        results = sorted(response.data['results'], key=lambda result: result['sha256'])
+        self.assertEqual([result['sha256'] for result in results], ['a' * 64, 'b' * 64])
+        self.assertEqual((results[0]['sha512'], results[0]['md5']), ('a' * 128, None))
+        self.assertEqual((results[1]['sha512'], results[1]['md5']), (None, 'b' * 32))
+        artifact = models.Artifact.objects.get(sha256='a' * 64)
+        self.assertEqual(results[0]['_href'],
+                         reverse('artifacts-detail', kwargs={'pk': artifact.pk}))
+
+    def test_no_checksums(self):
+        """Nothing is found without checksums."""
+        response = self.call('lookup', {'sha256': []})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+
+    def test_disallowed_checksum(self):
+        """Checksums which aren't in ALLOWED_CONTENT_CHECKSUMS are rejected."""
+        with self.settings(ALLOWED_CONTENT_CHECKSUMS=['sha256']):
+            response = self.call('lookup', {'md5': ['b' * 32]})
+            self.assertEqual(response.status_code, 400)
+
+            response = self.call('lookup', {'sha256': ['b' * 64]})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['results'], [{
+                '_href': reverse('artifacts-detail', kwargs={
+                    'pk': models.Artifact.objects.get(sha256='b' * 64).pk}),
+                'sha256': 'b' * 64,
+            }])
@@ -0,0 +1,239 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from pulpcore.app import models, tasks, viewsets
+
+
+class RepositoryVersionViewSetTestCase(TestCase):
+
+    def setUp(self):
+        task = models.Task.objects.create()
+        patcher = mock.patch('pulpcore.app.models.task.get_current_job',
+                             return_value=mock.Mock(id=task.job_id))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(username='admin')
+        self.repository = models.Repository.objects.create(name='viewset')
+
+    def new_version(self, add=(), remove=()):
+        with models.RepositoryVersion.create(self.repository) as version:
+            version.add_content(models.Content.objects.filter(pk__in=[c.pk for c in add]))
+            version.remove_content(models.Content.objects.filter(pk__in=[c.pk for c in remove]))
+        return version
+
+    def new_content(self, sha256, relative_path):
+        content = models.Content.objects.create()
+        models.Artifact.objects.bulk_create([models.Artifact(file=sha256, size=1, sha256=sha256)])
+        models.ContentArtifact.objects.create(
+            content=content, relative_path=relative_path,
+            artifact=models.Artifact.objects.get(sha256=sha256))
+        return content
+
+    def href(self, version):
+        return reverse('versions-detail', kwargs={'repository_pk': version.repository_id,
+                                                  'number': version.number})
+
+    def call(self, method, action, version, data=None):
+        factory = APIRequestFactory()
+        if method == 'post':
+            request = factory.post('/', data, format='json')
+        else:
+            request = factory.get('/versions/', data)
+        force_authenticate(request, user=self.user)
+        view = viewsets.RepositoryVersionViewSet.as_view({method: action})
+        return view(request, repository_pk=self.repository.pk, number=version.number)
+
+
+class ContainsTestCase(RepositoryVersionViewSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.present = self.new_content('a' * 64, 'a')
+        self.removed = self.new_content('b' * 64, 'b')
+        self.new_version(add=[self.present, self.removed])
+        self.version = self.new_version(remove=[self.removed])
+
+    def test_artifacts(self):
+        """Content is looked up by artifact digest, and optionally by relative path."""
+        artifacts = [
+            {'sha256': 'a' * 64},
+            {'sha256': 'a' * 64, 'relative_path': 'a'},
+            {'sha256': 'a' * 64, 'relative_path': 'other'},
+            {'sha256': 'b' * 64},
+            {'sha256': 'c' * 64},
+        ]
+
+        response = self.call('post', 'contains', self.version, {'artifacts': artifacts})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([artifact['present'] for artifact in response.data['artifacts']],
+                         [True, True, False, False, False])
+        self.assertEqual(response.data['content_hrefs'], {})
+
+    def test_disallowed_digest(self):
+        """Digests which aren't in ALLOWED_CONTENT_CHECKSUMS are rejected."""
+        with self.settings(ALLOWED_CONTENT_CHECKSUMS=['sha256']):
+            response = self.call('post', 'contains', self.version,
+                                 {'artifacts': [{'md5': 'a' * 32}]})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DiffTestCase(RepositoryVersionViewSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.contents = [models.Content.objects.create() for i in range(6)]
+        c = self.contents
+        self.base = self.new_version(add=c[:3])
+        self.version = self.new_version(add=c[3:5], remove=c[:1])
+
+    def diff(self, version, base_version, **params):
+        params['base_version'] = self.href(base_version)
+        response = self.call('get', 'diff', version, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def changes(self, data):
+        return [entry['change'] for entry in data['results']]
+
+    def test_pagination(self):
+        """Pages end after page_size changes, and only the first page has the summaries."""
+        _type = self.contents[0]._type
+
+        first = self.diff(self.version, self.base, page_size=2)
+        self.assertEqual(self.changes(first), ['removed', 'added'])
+        self.assertIn('after={pk}'.format(pk=self.contents[3].pk), first['next'])
+        self.assertEqual(first['content_added_summary'], {_type: 2})
+        self.assertEqual(first['content_removed_summary'], {_type: 1})
+
+        last = self.diff(self.version, self.base, page_size=2, after=self.contents[3].pk)
+        self.assertEqual(self.changes(last), ['added'])
+        self.assertIsNone(last['next'])
+        self.assertIsNone(last['content_added_summary'])
+        self.assertIsNone(last['content_removed_summary'])
+
+        whole = self.diff(self.version, self.base, page_size=3)
+        self.assertEqual(len(whole['results']), 3)
+        self.assertIsNone(whole['next'])
+
+    def test_same_version(self):
+        """A version doesn't differ from itself."""
+        data = self.diff(self.version, self.version)
+
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['content_added_summary'], {})
+        self.assertEqual(data['content_removed_summary'], {})
+
+    def test_other_repository(self):
+        """A version of another repository, which isn't an ancestor, is compared too."""
+        c = self.contents
+        repository = self.repository
+        self.repository = models.Repository.objects.create(name='other')
+        other = self.new_version(add=[c[1], c[5]])
+        self.repository = repository
+
+        data = self.diff(self.version, other)
+
+        self.assertEqual(self.changes(data), ['added', 'added', 'added', 'removed'])
+        self.assertEqual(data['content_added_summary'], {c[0]._type: 3})
+
+
+class ContentVersionsTestCase(RepositoryVersionViewSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.removed, self.added = [models.Content.objects.create() for i in range(2)]
+        self.new_version(add=[self.removed])
+        self.new_version(remove=[self.removed])
+        self.new_version(add=[self.removed, self.added])
+        self.hrefs = {'/content/{}/'.format(i): c.pk
+                      for i, c in enumerate((self.removed, self.added))}
+        # Core has no content endpoints, they're added by plugins
+        patcher = mock.patch.object(viewsets.NamedModelViewSet, 'get_resource_pks',
+                                    staticmethod(lambda uris, model: [self.hrefs[u] for u in uris]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def content_versions(self, content):
+        request = APIRequestFactory().get('/', {'content': content})
+        force_authenticate(request, user=self.user)
+        view = viewsets.RepositoryViewSet.as_view({'get': 'content_versions'})
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return sorted((r['repository'], r['content'], r['first_version'], r['last_version'])
+                      for r in response.data['results'])
+
+    def versions(self, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=self.user)
+        view = viewsets.RepositoryVersionViewSet.as_view({'get': 'list'})
+        response = view(request, repository_pk=self.repository.pk)
+        self.assertEqual(response.status_code, 200)
+        return [version['number'] for version in response.data['results']]
+
+    def test_content_versions(self):
+        """Each range of versions, of any repository, containing the content is listed."""
+        repository = reverse('repositories-detail', kwargs={'pk': self.repository.pk})
+        self.repository = models.Repository.objects.create(name='other')
+        self.new_version(add=[self.added])
+        other = reverse('repositories-detail', kwargs={'pk': self.repository.pk})
+
+        self.assertEqual(self.content_versions('/content/0/'), [
+            (repository, '/content/0/', 1, 1),
+            (repository, '/content/0/', 3, None),
+        ])
+        self.assertEqual(self.content_versions('/content/0/,/content/1/'), sorted([
+            (repository, '/content/0/', 1, 1),
+            (repository, '/content/0/', 3, None),
+            (repository, '/content/1/', 3, None),
+            (other, '/content/1/', 1, None),
+        ]))
+
+    def test_content_versions_without_content(self):
+        """The content must be given."""
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.user)
+        response = viewsets.RepositoryViewSet.as_view({'get': 'content_versions'})(request)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_content_filter(self):
+        """Versions are filtered by the content they contain."""
+        self.assertEqual(self.versions(content='/content/0/'), [3, 1])
+        self.assertEqual(self.versions(content='/content/1/'), [3])
+        self.assertEqual(self.versions(content__in='/content/0/,/content/1/'), [3, 1])
+
+
+class CloneTestCase(RepositoryVersionViewSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.version = self.new_version()
+        task = models.Task.objects.create()
+        patcher = mock.patch('pulpcore.app.viewsets.repository.enqueue_with_reservation',
+                             return_value=mock.Mock(id=task.job_id))
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clone(self):
+        """A task cloning the version into a new repository is dispatched."""
+        response = self.call('post', 'clone', self.version,
+                             {'name': 'clone', 'description': 'cloned'})
+
+        self.assertEqual(response.status_code, 202)
+        self.enqueue.assert_called_once_with(
+            tasks.repository.clone, [self.repository],
+            kwargs={'repository_version_pk': self.version.pk, 'name': 'clone',
+                    'description': 'cloned'})
+
+    def test_existing_name(self):
+        """The name of the new repository must be unique."""
+        response = self.call('post', 'clone', self.version, {'name': self.repository.name})
+
+        self.assertEqual(response.status_code, 400)
+        self.enqueue.assert_not_called()
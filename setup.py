@@ -5,7 +5,7 @@ with open('README.md') as f:
 
 requirements = [
     'coreapi',
-    'Django>=2.0',
+    'Django>=2.2',
     'django-filter',
     'djangorestframework',
     'djangorestframework-queryfields',